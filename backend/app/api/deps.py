@@ -1,16 +1,94 @@
 from collections.abc import Generator
+from typing import Optional
 
+from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core.config import Settings, get_settings
+from app.core.profiling import MemoryTracer, admin_token_valid
+from app.core.tracing import span
+from app.db.session import SessionLocal, engine, get_db
+from app.services.idempotency import IdempotencyCache
+from app.services.jobs import JobQueue
+from app.services.maintenance import MaintenanceService
+from app.services.media_store import MediaStore
+from app.services.quiz_pack import QuizPackStore
 from app.services.session_manager import SessionManager
 
 _session_manager = SessionManager()
+_idempotency_cache = IdempotencyCache()
+_memory_tracer = MemoryTracer()
+_media_store = MediaStore(get_settings().media_root, get_settings().media_variant_widths)
+_job_queue = JobQueue(
+    SessionLocal,
+    workers=get_settings().job_workers,
+    poll_interval=get_settings().job_poll_interval_seconds,
+)
+_quiz_pack_store = QuizPackStore(
+    SessionLocal, get_settings().quiz_pack_dir, max_maps=get_settings().quiz_pack_max_maps
+)
+_maintenance_service = MaintenanceService(
+    engine,
+    get_settings().maintenance_interval_seconds,
+    media_store=_media_store,
+)
 
 
 def get_db_session() -> Generator[Session, None, None]:
-    yield from get_db()
+    sessions = get_db()
+    with span("get_db_session", "dependency"):
+        db = next(sessions)
+    try:
+        yield db
+    finally:
+        with span("get_db_session.close", "dependency"):
+            sessions.close()
 
 
 def get_session_manager() -> SessionManager:
     return _session_manager
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    return _idempotency_cache
+
+
+def get_memory_tracer() -> MemoryTracer:
+    return _memory_tracer
+
+
+def get_media_store() -> MediaStore:
+    return _media_store
+
+
+def get_maintenance_service() -> MaintenanceService:
+    return _maintenance_service
+
+
+def get_quiz_pack_store() -> QuizPackStore:
+    return _quiz_pack_store
+
+
+def get_job_queue() -> JobQueue:
+    return _job_queue
+
+
+def prefers_async(
+    prefer: Optional[str] = Header(default=None),
+    queue: JobQueue = Depends(get_job_queue),
+) -> bool:
+    """Whether the client sent ``Prefer: respond-async`` (RFC 7240) and workers are running."""
+    if not prefer or not queue.enabled:
+        return False
+    preferences = (part.split(";", 1)[0].strip().lower() for part in prefer.split(","))
+    return "respond-async" in preferences
+
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(default=None),
+    settings: Settings = Depends(get_settings),
+) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not admin_token_valid(settings.admin_token, x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
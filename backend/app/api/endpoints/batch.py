@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db_session
+from app.api.endpoints.questions import add_question, apply_question_update, remove_question
+from app.api.endpoints.quizzes import apply_quiz_update
+from app.db.query_counter import count_budget_items, query_budget
+from app.schemas.batch import (
+    BatchOperation,
+    BatchOperationResult,
+    BatchRequest,
+    BatchResponse,
+    CreateQuestionOperation,
+    DeleteQuestionOperation,
+    UpdateQuestionOperation,
+    UpdateQuizOperation,
+)
+from app.schemas.question import QuestionRead
+from app.schemas.quiz import QuizRead
+
+router = APIRouter(prefix="/api/v1/batch", tags=["batch"])
+
+
+@router.post("/", response_model=BatchResponse)
+@query_budget(0, per_item=4)
+def run_batch(batch: BatchRequest, db: Session = Depends(get_db_session)) -> BatchResponse:
+    """Run editor operations in order inside one transaction.
+
+    The batch is all-or-nothing: the first failing operation rolls everything
+    back and its status is returned along with its index.
+    """
+    count_budget_items(len(batch.operations))
+    results = []
+    for index, operation in enumerate(batch.operations):
+        try:
+            results.append(_apply(db, index, operation))
+        except HTTPException as exc:
+            db.rollback()
+            raise HTTPException(
+                status_code=exc.status_code,
+                detail={"index": index, "op": operation.op, "detail": exc.detail},
+            ) from exc
+    db.commit()
+    return BatchResponse(results=results)
+
+
+def _apply(db: Session, index: int, operation: BatchOperation) -> BatchOperationResult:
+    # Bodies are serialised before commit so nothing has to be reloaded afterwards
+    if isinstance(operation, UpdateQuizOperation):
+        quiz = apply_quiz_update(db, operation.quiz_id, operation.data)
+        return BatchOperationResult(
+            index=index, status=status.HTTP_200_OK, body=QuizRead.model_validate(quiz)
+        )
+    if isinstance(operation, CreateQuestionOperation):
+        question = add_question(db, operation.quiz_id, operation.data)
+        return BatchOperationResult(
+            index=index, status=status.HTTP_201_CREATED, body=QuestionRead.model_validate(question)
+        )
+    if isinstance(operation, UpdateQuestionOperation):
+        question = apply_question_update(db, operation.question_id, operation.data)
+        return BatchOperationResult(
+            index=index, status=status.HTTP_200_OK, body=QuestionRead.model_validate(question)
+        )
+    if isinstance(operation, DeleteQuestionOperation):
+        remove_question(db, operation.question_id)
+        return BatchOperationResult(index=index, status=status.HTTP_204_NO_CONTENT)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported operation")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db_session, get_job_queue
+from app.db.query_counter import query_budget
+from app.models import Job
+from app.schemas.job import JobRead
+from app.services import jobs
+from app.services.jobs import JobQueue
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+
+def job_accepted(job: Job) -> Response:
+    """The ``202 Accepted`` answer for a request that was handed to the job queue."""
+    return Response(
+        content=JobRead.model_validate(job).model_dump_json(),
+        status_code=status.HTTP_202_ACCEPTED,
+        media_type="application/json",
+        headers={"Location": f"{router.prefix}/{job.id}", "Preference-Applied": "respond-async"},
+    )
+
+
+@router.get("/", response_model=List[JobRead])
+@query_budget(1)
+def list_jobs(
+    profile_id: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db_session),
+) -> List[JobRead]:
+    stmt = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if profile_id is not None:
+        stmt = stmt.where(Job.profile_id == profile_id)
+    return db.scalars(stmt).all()
+
+
+@router.get("/{job_id}", response_model=JobRead)
+@query_budget(1)
+def get_job(job_id: str, db: Session = Depends(get_db_session)) -> JobRead:
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job  # type: ignore[return-value]
+
+
+@router.post("/{job_id}/cancel", response_model=JobRead)
+@query_budget(3)
+def cancel_job(
+    job_id: str,
+    response: Response,
+    db: Session = Depends(get_db_session),
+    queue: JobQueue = Depends(get_job_queue),
+) -> JobRead:
+    """Cancel a queued job, or ask a running one to stop at its next checkpoint.
+
+    A running job answers ``202`` and finishes as ``cancelled`` once its
+    handler notices; work it already committed is kept.
+    """
+    job = queue.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status == jobs.RUNNING:
+        response.status_code = status.HTTP_202_ACCEPTED
+    elif job.status != jobs.CANCELLED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status}")
+    return job  # type: ignore[return-value]
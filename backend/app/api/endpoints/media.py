@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db_session, get_media_store
+from app.core.config import Settings, get_settings
+from app.core.http_cache import etag_matches, not_modified
+from app.db.query_counter import query_budget
+from app.models import Question, QuestionAttachment
+from app.schemas.attachment import AttachmentRead
+from app.services.media_store import MediaStore
+
+router = APIRouter(prefix="/api/v1", tags=["media"])
+
+# Media URLs are keyed by content hash, so a URL never changes meaning
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+@router.post(
+    "/questions/{question_id}/attachments",
+    response_model=AttachmentRead,
+    status_code=status.HTTP_201_CREATED,
+)
+@query_budget(2)
+def upload_attachment(
+    question_id: str,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db_session),
+    store: MediaStore = Depends(get_media_store),
+    settings: Settings = Depends(get_settings),
+) -> AttachmentRead:
+    if db.get(Question, question_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    try:
+        stored = store.save(file.file, content_type, settings.media_max_bytes)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    attachment = QuestionAttachment(
+        question_id=question_id,
+        content_hash=stored.content_hash,
+        content_type=content_type,
+        filename=file.filename,
+        size=stored.size,
+        width=stored.width,
+        height=stored.height,
+    )
+    db.add(attachment)
+    db.commit()
+    return attachment  # type: ignore[return-value]
+
+
+@router.get("/questions/{question_id}/attachments", response_model=List[AttachmentRead])
+@query_budget(2)
+def list_attachments(question_id: str, db: Session = Depends(get_db_session)) -> List[AttachmentRead]:
+    if db.get(Question, question_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+    stmt = (
+        select(QuestionAttachment)
+        .where(QuestionAttachment.question_id == question_id)
+        .order_by(QuestionAttachment.created_at)
+    )
+    return db.scalars(stmt).all()
+
+
+@router.delete("/attachments/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(1)
+def delete_attachment(attachment_id: str, db: Session = Depends(get_db_session)) -> Response:
+    # The blob stays on disk until maintenance finds it unreferenced
+    result = db.execute(delete(QuestionAttachment).where(QuestionAttachment.id == attachment_id))
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/media/{content_hash}")
+@query_budget(1)
+def get_media(
+    content_hash: str,
+    request: Request,
+    width: Optional[int] = None,
+    db: Session = Depends(get_db_session),
+    store: MediaStore = Depends(get_media_store),
+) -> Response:
+    """Serve a blob (or its closest downscaled variant) with range support.
+
+    FileResponse streams from disk in chunks, or hands the file to the server
+    via the ASGI zero-copy extension when the server supports it.
+    """
+    if not _HASH_PATTERN.match(content_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    path = store.resolve(content_hash, width)
+    stmt = (
+        select(QuestionAttachment.content_type)
+        .where(QuestionAttachment.content_hash == content_hash)
+        .limit(1)
+    )
+    content_type = db.scalar(stmt)
+    if path is None or content_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    etag = f'"{path.name}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, MEDIA_CACHE_CONTROL)
+    return FileResponse(
+        path,
+        media_type=content_type,
+        headers={"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL},
+    )
@@ -1,27 +1,49 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, selectinload
-
-from app.api.deps import get_db_session
-from app.models import Profile, Quiz
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db_session, get_job_queue, prefers_async
+from app.api.endpoints.jobs import job_accepted
+from app.api.endpoints.quizzes import fetch_quiz_summary_rows, quiz_summary_from_row
+from app.core.http_cache import (
+    PROFILE_CACHE_CONTROL,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from app.db.query_counter import query_budget
+from app.models import ChangeLogEntry, Profile, Question, Quiz
+from app.schemas.change import ChangeFeed, DeletedEntity, QuizChange
 from app.schemas.profile import ProfileCreate, ProfileDetail, ProfileRead
-from app.schemas.quiz import QuizSummary
+from app.schemas.question import QuestionRead
+from app.schemas.read_rows import PROFILE_LIST_ADAPTER
+from app.services import change_feed, quiz_pack
+from app.services.jobs import JobContext, JobQueue, job_handler
 
 router = APIRouter(prefix="/api/v1/profiles", tags=["profiles"])
 
+DELETE_PROFILE_JOB = "delete_profile"
+
 
 @router.get("/", response_model=List[ProfileRead])
+@query_budget(1)
 def list_profiles(db: Session = Depends(get_db_session)) -> List[ProfileRead]:
-    stmt = select(Profile).order_by(Profile.created_at)
-    return db.scalars(stmt).all()
+    columns = Profile.__table__.c
+    stmt = select(columns.name, columns.id, columns.created_at).order_by(columns.created_at)
+    rows = [dict(row) for row in db.execute(stmt).mappings()]
+    return Response(  # type: ignore[return-value]
+        content=PROFILE_LIST_ADAPTER.dump_json(rows), media_type="application/json"
+    )
 
 
 @router.post("/", response_model=ProfileRead, status_code=status.HTTP_201_CREATED)
+@query_budget(1)
 def create_profile(profile_in: ProfileCreate, db: Session = Depends(get_db_session)) -> ProfileRead:
     profile = Profile(name=profile_in.name.strip())
     db.add(profile)
@@ -33,34 +55,36 @@ def create_profile(profile_in: ProfileCreate, db: Session = Depends(get_db_sessi
             status_code=status.HTTP_409_CONFLICT,
             detail="Profile name already exists",
         ) from exc
-    db.refresh(profile)
     return profile  # type: ignore[return-value]
 
 
 @router.get("/{profile_id}", response_model=ProfileDetail)
-def get_profile(profile_id: str, db: Session = Depends(get_db_session)) -> ProfileDetail:
-    stmt = (
-        select(Profile)
-        .where(Profile.id == profile_id)
-        .options(selectinload(Profile.quizzes).selectinload(Quiz.questions))
-    )
-    profile = db.scalars(stmt).first()
+@query_budget(2)
+def get_profile(
+    profile_id: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db_session),
+) -> ProfileDetail:
+    columns = Profile.__table__.c
+    stmt = select(
+        columns.name, columns.created_at, change_feed.profile_version(columns.id).label("version")
+    ).where(columns.id == profile_id)
+    profile = db.execute(stmt).first()
     if profile is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
 
-    quiz_summaries = [
-        QuizSummary(
-            id=quiz.id,
-            title=quiz.title,
-            description=quiz.description,
-            question_count=len(quiz.questions),
-            created_at=quiz.created_at,
-        )
-        for quiz in profile.quizzes
-    ]
+    # Renames are not logged as changes, so the name is part of the version
+    etag = make_etag("profile", profile_id, profile.name, profile.version)
+    if etag_matches(request, etag):
+        return not_modified(etag, PROFILE_CACHE_CONTROL)  # type: ignore[return-value]
+
+    summary_rows = fetch_quiz_summary_rows(db, profile_id)
+    quiz_summaries = [quiz_summary_from_row(row) for row in summary_rows]
 
+    set_cache_headers(response, etag, PROFILE_CACHE_CONTROL)
     return ProfileDetail(
-        id=profile.id,
+        id=profile_id,
         name=profile.name,
         created_at=profile.created_at,
         quiz_count=len(quiz_summaries),
@@ -69,17 +93,20 @@ def get_profile(profile_id: str, db: Session = Depends(get_db_session)) -> Profi
 
 
 @router.patch("/{profile_id}", response_model=ProfileRead)
+@query_budget(1)
 def update_profile(
     profile_id: str,
     profile_in: ProfileCreate,
     db: Session = Depends(get_db_session),
 ) -> ProfileRead:
-    profile = db.get(Profile, profile_id)
-    if profile is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
-
-    profile.name = profile_in.name.strip()
+    stmt = (
+        update(Profile)
+        .where(Profile.id == profile_id)
+        .values(name=profile_in.name.strip())
+        .returning(Profile)
+    )
     try:
+        profile = db.scalar(stmt)
         db.commit()
     except IntegrityError as exc:
         db.rollback()
@@ -87,16 +114,120 @@ def update_profile(
             status_code=status.HTTP_409_CONFLICT,
             detail="Profile name already exists",
         ) from exc
-    db.refresh(profile)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
     return profile  # type: ignore[return-value]
 
 
 @router.delete("/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_profile(profile_id: str, db: Session = Depends(get_db_session)) -> Response:
-    profile = db.get(Profile, profile_id)
-    if profile is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
-
-    db.delete(profile)
+@query_budget(2)
+def delete_profile(
+    profile_id: str,
+    db: Session = Depends(get_db_session),
+    respond_async: bool = Depends(prefers_async),
+    queue: JobQueue = Depends(get_job_queue),
+) -> Response:
+    """Delete a profile with everything in it; ``Prefer: respond-async`` queues it as a job instead."""
+    if respond_async:
+        if db.scalar(select(Profile.id).where(Profile.id == profile_id)) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+        job = queue.enqueue(db, DELETE_PROFILE_JOB, {"profile_id": profile_id}, profile_id=profile_id)
+        return job_accepted(job)
+
+    _remove_profile(db, profile_id)
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@job_handler(DELETE_PROFILE_JOB)
+def run_delete_profile_job(db: Session, payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Delete quiz by quiz, committing each, so progress shows and cancellation can stop it.
+
+    A cancelled job keeps the quizzes it already deleted; the profile survives.
+    """
+    profile_id = payload["profile_id"]
+    quiz_ids = db.scalars(select(Quiz.id).where(Quiz.profile_id == profile_id)).all()
+    for done, quiz_id in enumerate(quiz_ids):
+        context.progress(done, len(quiz_ids) + 1)
+        db.execute(delete(Quiz).where(Quiz.id == quiz_id))
+        change_feed.record_quiz_change(db, profile_id, quiz_id, change_feed.DELETE)
+        db.commit()
+    context.progress(len(quiz_ids), len(quiz_ids) + 1)
+    _remove_profile(db, profile_id)
+    db.commit()
+    return {"profile_id": profile_id, "quizzes_deleted": len(quiz_ids)}
+
+
+def _remove_profile(db: Session, profile_id: str) -> None:
+    # Questions go with their quizzes via ON DELETE CASCADE, without loading them;
+    # the quizzes are deleted first only to learn whose packs to drop.
+    quiz_ids = db.scalars(delete(Quiz).where(Quiz.profile_id == profile_id).returning(Quiz.id)).all()
+    quiz_pack.mark_changed(db, quiz_ids)
+    result = db.execute(delete(Profile).where(Profile.id == profile_id))
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+
+@router.get("/{profile_id}/changes", response_model=ChangeFeed)
+@query_budget(4)
+def list_profile_changes(
+    profile_id: str,
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_db_session),
+) -> ChangeFeed:
+    """Return quizzes and questions changed after ``since`` for syncing local replicas.
+
+    Only the latest change per entity is reported. A deleted quiz implies the
+    deletion of all its questions. Pass ``next_since`` back as ``since`` until
+    ``has_more`` is false.
+
+    Within one profile, ``seq`` values become visible in increasing order:
+    writers to a profile are serialised on its change counter row, so an
+    entry can never commit below a ``next_since`` a reader has already been
+    given. ``seq`` is shared by all profiles and has gaps.
+    """
+    if db.get(Profile, profile_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    stmt = (
+        select(ChangeLogEntry.seq, ChangeLogEntry.entity_type, ChangeLogEntry.entity_id, ChangeLogEntry.op)
+        .where(ChangeLogEntry.profile_id == profile_id, ChangeLogEntry.seq > since)
+        .order_by(ChangeLogEntry.seq)
+        .limit(limit + 1)
+    )
+    entries = db.execute(stmt).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest: dict[tuple[str, str], str] = {}
+    for entry in entries:
+        latest[(entry.entity_type, entry.entity_id)] = entry.op
+
+    def upserted(entity_type: str) -> List[str]:
+        return [
+            entity_id
+            for (kind, entity_id), op in latest.items()
+            if kind == entity_type and op == change_feed.UPSERT
+        ]
+
+    quiz_ids = upserted(change_feed.QUIZ)
+    question_ids = upserted(change_feed.QUESTION)
+    quizzes = db.scalars(select(Quiz).where(Quiz.id.in_(quiz_ids))).all() if quiz_ids else []
+    questions = (
+        db.scalars(select(Question).where(Question.id.in_(question_ids))).all() if question_ids else []
+    )
+
+    return ChangeFeed(
+        since=since,
+        next_since=entries[-1].seq if entries else since,
+        has_more=has_more,
+        quizzes=[QuizChange.model_validate(quiz) for quiz in quizzes],
+        questions=[QuestionRead.model_validate(question) for question in questions],
+        deleted=[
+            DeletedEntity(entity_type=kind, entity_id=entity_id)
+            for (kind, entity_id), op in latest.items()
+            if op == change_feed.DELETE
+        ],
+    )
@@ -1,31 +1,55 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db_session
+from app.core.http_cache import (
+    QUESTIONS_CACHE_CONTROL,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from app.db.errors import is_foreign_key_violation
+from app.db.query_counter import query_budget
 from app.models import Question, Quiz
 from app.schemas.question import (
+    BoardLayoutUpdate,
     QuestionCreate,
     QuestionOrderUpdate,
     QuestionRead,
     QuestionUpdate,
 )
+from app.schemas.read_rows import QUESTION_LIST_ADAPTER
+from app.services import change_feed
 
 router = APIRouter(prefix="/api/v1", tags=["questions"])
 
 
 @router.get("/quizzes/{quiz_id}/questions", response_model=List[QuestionRead])
+@query_budget(2)
 def list_questions_for_quiz(
     quiz_id: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db_session),
 ) -> List[QuestionRead]:
-    _ensure_quiz_exists(db, quiz_id)
-    stmt = select(Question).where(Question.quiz_id == quiz_id).order_by(Question.points)
-    return db.scalars(stmt).all()
+    version = db.scalar(select(change_feed.profile_version(Quiz.profile_id)).where(Quiz.id == quiz_id))
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    etag = make_etag("questions", quiz_id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag, QUESTIONS_CACHE_CONTROL)  # type: ignore[return-value]
+
+    body = QUESTION_LIST_ADAPTER.dump_json(fetch_question_rows(db, quiz_id))
+    raw = Response(content=body, media_type="application/json")
+    set_cache_headers(raw, etag, QUESTIONS_CACHE_CONTROL)
+    return raw  # type: ignore[return-value]
 
 
 @router.post(
@@ -33,20 +57,19 @@ def list_questions_for_quiz(
     response_model=QuestionRead,
     status_code=status.HTTP_201_CREATED,
 )
+@query_budget(3)
 def create_question(
     quiz_id: str,
     question_in: QuestionCreate,
     db: Session = Depends(get_db_session),
 ) -> QuestionRead:
-    _ensure_quiz_exists(db, quiz_id)
-    question = Question(quiz_id=quiz_id, **question_in.model_dump())
-    db.add(question)
+    question = add_question(db, quiz_id, question_in)
     db.commit()
-    db.refresh(question)
     return question  # type: ignore[return-value]
 
 
 @router.get("/questions/{question_id}", response_model=QuestionRead)
+@query_budget(1)
 def get_question(question_id: str, db: Session = Depends(get_db_session)) -> QuestionRead:
     question = db.get(Question, question_id)
     if question is None:
@@ -55,65 +78,161 @@ def get_question(question_id: str, db: Session = Depends(get_db_session)) -> Que
 
 
 @router.put("/questions/{question_id}", response_model=QuestionRead)
+@query_budget(3)
 def update_question(
     question_id: str,
     question_update: QuestionUpdate,
     db: Session = Depends(get_db_session),
 ) -> QuestionRead:
-    question = db.get(Question, question_id)
-    if question is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
-
-    payload = question_update.model_dump(exclude_unset=True)
-    if "options" in payload and "correct_index" not in payload:
-        # ensure correct_index still valid after options update
-        if not 0 <= question.correct_index < len(payload["options"]):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="correct_index must reference updated options",
-            )
-
-    if "correct_index" in payload and "options" not in payload:
-        if not 0 <= payload["correct_index"] < len(question.options):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="correct_index must reference existing options",
-            )
-
-    for field, value in payload.items():
-        setattr(question, field, value)
-
+    question = apply_question_update(db, question_id, question_update)
     db.commit()
-    db.refresh(question)
     return question  # type: ignore[return-value]
 
 
 @router.delete("/questions/{question_id}")
+@query_budget(3)
 def delete_question(question_id: str, db: Session = Depends(get_db_session)) -> None:
-    question = db.get(Question, question_id)
-    if question is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
-
-    db.delete(question)
+    remove_question(db, question_id)
     db.commit()
 
 
 @router.patch("/questions/{question_id}/order", response_model=QuestionRead)
+@query_budget(3)
 def update_question_order(
     question_id: str,
     order_update: QuestionOrderUpdate,
     db: Session = Depends(get_db_session),
 ) -> QuestionRead:
-    question = db.get(Question, question_id)
+    question = _update_question_returning(db, question_id, order_update.model_dump(exclude_unset=True))
     if question is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+    change_feed.record_question_changes(db, question.quiz_id, [question.id], change_feed.UPSERT)
+    db.commit()
+    return question  # type: ignore[return-value]
 
-    for field, value in order_update.model_dump(exclude_unset=True).items():
-        setattr(question, field, value)
 
+@router.put("/quizzes/{quiz_id}/questions/order", response_model=List[QuestionRead])
+@query_budget(6)
+def update_board_layout(
+    quiz_id: str,
+    layout: BoardLayoutUpdate,
+    db: Session = Depends(get_db_session),
+) -> List[QuestionRead]:
+    """Apply a whole board layout in one executemany UPDATE and one commit."""
+    existing_ids = set(db.scalars(select(Question.id).where(Question.quiz_id == quiz_id)))
+    if not existing_ids:
+        _ensure_quiz_exists(db, quiz_id)
+
+    # Omitted difficulties stay as they are; placements that set one go in a second executemany
+    placements = layout.model_dump(mode="json", exclude_unset=True)["questions"]
+    layout_ids = [placement["id"] for placement in placements]
+    if len(set(layout_ids)) != len(layout_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each question may appear only once in the layout",
+        )
+    if set(layout_ids) != existing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Layout must contain exactly the questions of this quiz",
+        )
+
+    db.execute(update(Question), placements)
+    change_feed.record_question_changes(db, quiz_id, layout_ids, change_feed.UPSERT)
     db.commit()
-    db.refresh(question)
-    return question  # type: ignore[return-value]
+
+    stmt = select(Question).where(Question.quiz_id == quiz_id).order_by(Question.points, Question.difficulty)
+    return db.scalars(stmt).all()
+
+
+def fetch_question_rows(db: Session, quiz_id: str) -> List[Dict[str, Any]]:
+    """Load a quiz's questions as plain dicts in board order, without ORM objects."""
+    columns = Question.__table__.c
+    stmt = (
+        select(
+            columns.prompt,
+            columns.options,
+            columns.correct_index,
+            columns.points,
+            columns.difficulty,
+            columns.id,
+            columns.quiz_id,
+            columns.created_at,
+            columns.updated_at,
+        )
+        .where(columns.quiz_id == quiz_id)
+        .order_by(columns.points)
+    )
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def add_question(db: Session, quiz_id: str, question_in: QuestionCreate) -> Question:
+    """Insert a question without committing, so callers can batch several writes."""
+    question = Question(quiz_id=quiz_id, **question_in.model_dump())
+    db.add(question)
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        # The quiz_id foreign key doubles as the existence check; the caller
+        # rolls back, as after any failed write.
+        if not is_foreign_key_violation(exc):
+            raise
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found") from exc
+    change_feed.record_question_changes(db, quiz_id, [question.id], change_feed.UPSERT)
+    return question
+
+
+def apply_question_update(db: Session, question_id: str, question_update: QuestionUpdate) -> Question:
+    payload = question_update.model_dump(exclude_unset=True)
+
+    # A partial options/correct_index change must keep the answer in range; the
+    # check rides along in the UPDATE's WHERE clause, so an invalid change never
+    # touches the row and the caller's transaction is left alone.
+    conditions: List[Any] = []
+    problem = None
+    if "options" in payload and "correct_index" not in payload:
+        conditions = [Question.correct_index >= 0, Question.correct_index < len(payload["options"])]
+        problem = "correct_index must reference updated options"
+    elif "correct_index" in payload and "options" not in payload:
+        conditions = [
+            literal(payload["correct_index"] >= 0),
+            func.json_array_length(Question.options) > payload["correct_index"],
+        ]
+        problem = "correct_index must reference existing options"
+
+    question = _update_question_returning(db, question_id, payload, *conditions)
+    if question is None:
+        if problem is not None and db.get(Question, question_id) is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=problem)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+
+    change_feed.record_question_changes(db, question.quiz_id, [question.id], change_feed.UPSERT)
+    return question
+
+
+def remove_question(db: Session, question_id: str) -> None:
+    quiz_id = db.scalar(delete(Question).where(Question.id == question_id).returning(Question.quiz_id))
+    if quiz_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+    change_feed.record_question_changes(db, quiz_id, [question_id], change_feed.DELETE)
+
+
+def _update_question_returning(
+    db: Session, question_id: str, payload: dict, *conditions: Any
+) -> Optional[Question]:
+    """Apply ``payload`` with a single UPDATE ... RETURNING instead of load-then-flush.
+
+    Returns None when no row matched the id and ``conditions``.
+    """
+    if not payload:
+        return db.get(Question, question_id)
+    stmt = (
+        update(Question)
+        .where(Question.id == question_id, *conditions)
+        .values(**payload)
+        .returning(Question)
+    )
+    return db.scalar(stmt)
 
 
 def _ensure_quiz_exists(db: Session, quiz_id: str) -> None:
@@ -1,35 +1,45 @@
 from __future__ import annotations
 
-from typing import List
+import uuid
+from typing import Any, Dict, List, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
 
-from app.api.deps import get_db_session
-from app.models import Profile, Question, Quiz
-from app.schemas.quiz import QuizCreate, QuizRead, QuizSummary, QuizUpdate
+from app.api.deps import get_db_session, get_job_queue, get_quiz_pack_store, prefers_async
+from app.api.endpoints.jobs import job_accepted
+from app.api.endpoints.questions import fetch_question_rows
+from app.core.http_cache import (
+    QUIZ_CACHE_CONTROL,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+)
+from app.db.errors import is_foreign_key_violation
+from app.db.query_counter import query_budget
+from app.models import Profile, Question, QuestionAttachment, QuestionDraw, Quiz
+from app.schemas.quiz import QuizAssembly, QuizCreate, QuizRead, QuizSummary, QuizUpdate
+from app.schemas.read_rows import QUIZ_ADAPTER
+from app.services import change_feed, question_bank
+from app.services.jobs import JobContext, JobQueue, job_handler
+from app.services.quiz_pack import PACK_MEDIA_TYPE, QuizPack, QuizPackStore
 
 router = APIRouter(prefix="/api/v1", tags=["quizzes"])
 
+DUPLICATE_QUIZ_JOB = "duplicate_quiz"
+
 
 @router.get("/profiles/{profile_id}/quizzes", response_model=List[QuizSummary])
+@query_budget(2)
 def list_quizzes_for_profile(
     profile_id: str,
     db: Session = Depends(get_db_session),
 ) -> List[QuizSummary]:
     _ensure_profile_exists(db, profile_id)
-    quizzes = _fetch_quizzes_for_profile(db, profile_id)
-    return [
-        QuizSummary(
-            id=quiz.id,
-            title=quiz.title,
-            description=quiz.description,
-            question_count=len(quiz.questions),
-            created_at=quiz.created_at,
-        )
-        for quiz in quizzes
-    ]
+    return [quiz_summary_from_row(row) for row in fetch_quiz_summary_rows(db, profile_id)]
 
 
 @router.post(
@@ -37,56 +47,219 @@ def list_quizzes_for_profile(
     response_model=QuizRead,
     status_code=status.HTTP_201_CREATED,
 )
+@query_budget(3)
 def create_quiz_for_profile(
     profile_id: str,
     quiz_in: QuizCreate,
     db: Session = Depends(get_db_session),
 ) -> QuizRead:
-    _ensure_profile_exists(db, profile_id)
-    quiz = Quiz(profile_id=profile_id, **quiz_in.model_dump())
+    quiz = Quiz(profile_id=profile_id, questions=[], **quiz_in.model_dump())
     db.add(quiz)
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        # The profile_id foreign key doubles as the existence check
+        db.rollback()
+        if not is_foreign_key_violation(exc):
+            raise
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found") from exc
+    change_feed.record_quiz_change(db, profile_id, quiz.id, change_feed.UPSERT)
     db.commit()
-    db.refresh(quiz)
     return quiz  # type: ignore[return-value]
 
 
+@router.post(
+    "/profiles/{profile_id}/quizzes/assemble",
+    response_model=QuizRead,
+    status_code=status.HTTP_201_CREATED,
+)
+@query_budget(16)
+def assemble_quiz(
+    profile_id: str,
+    assembly: QuizAssembly,
+    db: Session = Depends(get_db_session),
+) -> QuizRead:
+    """Build a new quiz from questions drawn per points tier and difficulty across the profile.
+
+    Questions are sampled from random ranges of the profile's sample index
+    rather than by ordering the whole bank with RANDOM(). Bank questions drawn
+    into another assembled quiz within ``exclude_recent_days`` are skipped, and
+    assembled copies never count as bank questions themselves.
+    """
+    _ensure_profile_exists(db, profile_id)
+    question_bank.refresh_sample_index(db, profile_id)
+    strata = [
+        question_bank.Stratum(
+            stratum.points, stratum.difficulty.value if stratum.difficulty else None, stratum.count
+        )
+        for stratum in assembly.strata
+    ]
+    chosen, shortfalls = question_bank.draw_questions(
+        db, profile_id, strata, question_bank.recent_cutoff(assembly.exclude_recent_days)
+    )
+    if shortfalls:
+        # Keep the refreshed index; nothing else has been written yet
+        db.commit()
+        wanted = ", ".join(f"{stratum.label()} (wanted {stratum.count})" for stratum in shortfalls)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Not enough unused questions for {wanted}",
+        )
+
+    columns = Question.__table__.c
+    sources = db.execute(
+        select(
+            columns.id,
+            columns.prompt,
+            columns.options,
+            columns.correct_index,
+            columns.points,
+            columns.difficulty,
+        ).where(columns.id.in_(chosen))
+    ).all()
+
+    quiz = Quiz(profile_id=profile_id, questions=[], **assembly.model_dump(include={"title", "description"}))
+    db.add(quiz)
+    db.flush()
+    copies = [
+        {
+            "id": str(uuid.uuid4()),
+            "quiz_id": quiz.id,
+            "prompt": source.prompt,
+            "options": source.options,
+            "correct_index": source.correct_index,
+            "points": source.points,
+            "difficulty": source.difficulty,
+        }
+        for source in sources
+    ]
+    # Core inserts keep this one executemany each; the ORM would split rows by which keys are None
+    db.execute(insert(Question.__table__), copies)
+    db.execute(
+        insert(QuestionDraw.__table__),
+        [
+            {"copy_id": copy["id"], "source_id": source.id, "profile_id": profile_id}
+            for copy, source in zip(copies, sources)
+        ],
+    )
+    change_feed.record_quiz_change(db, profile_id, quiz.id, change_feed.UPSERT)
+    change_feed.record_question_changes(db, quiz.id, [copy["id"] for copy in copies], change_feed.UPSERT)
+    db.commit()
+
+    body = QUIZ_ADAPTER.dump_json(
+        {
+            "title": quiz.title,
+            "description": quiz.description,
+            "id": quiz.id,
+            "profile_id": quiz.profile_id,
+            "created_at": quiz.created_at,
+            "updated_at": quiz.updated_at,
+            "questions": fetch_question_rows(db, quiz.id),
+        }
+    )
+    return Response(  # type: ignore[return-value]
+        content=body, media_type="application/json", status_code=status.HTTP_201_CREATED
+    )
+
+
 @router.get("/quizzes/{quiz_id}", response_model=QuizRead)
-def get_quiz(quiz_id: str, db: Session = Depends(get_db_session)) -> QuizRead:
-    quiz = _fetch_quiz_with_questions(db, quiz_id)
-    return quiz  # type: ignore[return-value]
+@query_budget(3)
+def get_quiz(
+    quiz_id: str,
+    request: Request,
+    db: Session = Depends(get_db_session),
+    packs: QuizPackStore = Depends(get_quiz_pack_store),
+) -> QuizRead:
+    """Serve the quiz document straight out of its pack; the database is only read to build one."""
+    pack = _require_pack(db, packs, quiz_id)
+    if etag_matches(request, pack.etag):
+        return not_modified(pack.etag, QUIZ_CACHE_CONTROL)  # type: ignore[return-value]
+    raw = Response(content=pack.document(), media_type="application/json")
+    set_cache_headers(raw, pack.etag, QUIZ_CACHE_CONTROL)
+    return raw  # type: ignore[return-value]
+
+
+@router.get(
+    "/quizzes/{quiz_id}/pack",
+    response_class=StreamingResponse,
+    responses={200: {"content": {PACK_MEDIA_TYPE: {}}}},
+)
+@query_budget(3)
+def get_quiz_pack(
+    quiz_id: str,
+    request: Request,
+    db: Session = Depends(get_db_session),
+    packs: QuizPackStore = Depends(get_quiz_pack_store),
+) -> Response:
+    """Stream the binary quiz pack as stored, for clients that decode packs themselves."""
+    pack = _require_pack(db, packs, quiz_id)
+    if etag_matches(request, pack.etag):
+        return not_modified(pack.etag, QUIZ_CACHE_CONTROL)
+    streamed = StreamingResponse(
+        pack.chunks(),
+        media_type=PACK_MEDIA_TYPE,
+        headers={"Content-Length": str(len(pack))},
+    )
+    set_cache_headers(streamed, pack.etag, QUIZ_CACHE_CONTROL)
+    return streamed
 
 
 @router.put("/quizzes/{quiz_id}", response_model=QuizRead)
+@query_budget(4)
 def update_quiz(
     quiz_id: str,
     quiz_update: QuizUpdate,
     db: Session = Depends(get_db_session),
 ) -> QuizRead:
-    quiz = db.get(Quiz, quiz_id)
-    if quiz is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
-
-    for field, value in quiz_update.model_dump(exclude_unset=True).items():
-        setattr(quiz, field, value)
-
+    quiz = apply_quiz_update(db, quiz_id, quiz_update)
     db.commit()
-    db.refresh(quiz)
     return quiz  # type: ignore[return-value]
 
 
 @router.delete("/quizzes/{quiz_id}")
+@query_budget(3)
 def delete_quiz(quiz_id: str, db: Session = Depends(get_db_session)) -> None:
-    quiz = db.get(Quiz, quiz_id)
-    if quiz is None:
+    profile_id = db.scalar(delete(Quiz).where(Quiz.id == quiz_id).returning(Quiz.profile_id))
+    if profile_id is None:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
-
-    db.delete(quiz)
+    # Questions cascade with the quiz; feed clients drop them along with it
+    change_feed.record_quiz_change(db, profile_id, quiz_id, change_feed.DELETE)
     db.commit()
 
 
 @router.post("/quizzes/{quiz_id}/duplicate", response_model=QuizRead)
-def duplicate_quiz(quiz_id: str, db: Session = Depends(get_db_session)) -> QuizRead:
-    quiz = _fetch_quiz_with_questions(db, quiz_id)
+@query_budget(9)
+def duplicate_quiz(
+    quiz_id: str,
+    db: Session = Depends(get_db_session),
+    respond_async: bool = Depends(prefers_async),
+    queue: JobQueue = Depends(get_job_queue),
+) -> QuizRead:
+    """Copy a quiz with its questions; ``Prefer: respond-async`` queues it as a job instead."""
+    if respond_async:
+        profile_id = db.scalar(select(Quiz.profile_id).where(Quiz.id == quiz_id))
+        if profile_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+        job = queue.enqueue(db, DUPLICATE_QUIZ_JOB, {"quiz_id": quiz_id}, profile_id=profile_id)
+        return job_accepted(job)  # type: ignore[return-value]
+
+    duplicate = copy_quiz(db, quiz_id)
+    db.commit()
+    return duplicate  # type: ignore[return-value]
+
+
+@job_handler(DUPLICATE_QUIZ_JOB)
+def run_duplicate_quiz_job(db: Session, payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    context.progress(0, 1)
+    duplicate = copy_quiz(db, payload["quiz_id"])
+    db.commit()
+    return {"quiz_id": duplicate.id, "question_count": len(duplicate.questions)}
+
+
+def copy_quiz(db: Session, quiz_id: str) -> Quiz:
+    """Copy a quiz, its questions and their attachments without committing."""
+    quiz = _fetch_quiz_with_questions(db, quiz_id, with_attachments=True)
 
     duplicate = Quiz(
         profile_id=quiz.profile_id,
@@ -101,13 +274,42 @@ def duplicate_quiz(quiz_id: str, db: Session = Depends(get_db_session)) -> QuizR
                 correct_index=question.correct_index,
                 points=question.points,
                 difficulty=question.difficulty,
+                # Blobs are content-addressed, so copies share the files on disk
+                attachments=[
+                    QuestionAttachment(
+                        content_hash=attachment.content_hash,
+                        content_type=attachment.content_type,
+                        filename=attachment.filename,
+                        size=attachment.size,
+                        width=attachment.width,
+                        height=attachment.height,
+                    )
+                    for attachment in question.attachments
+                ],
             )
         )
 
     db.add(duplicate)
-    db.commit()
-    db.refresh(duplicate)
-    return duplicate  # type: ignore[return-value]
+    db.flush()
+    change_feed.record_quiz_change(db, duplicate.profile_id, duplicate.id, change_feed.UPSERT)
+    change_feed.record_question_changes(
+        db, duplicate.id, [question.id for question in duplicate.questions], change_feed.UPSERT
+    )
+    return duplicate
+
+
+def apply_quiz_update(db: Session, quiz_id: str, quiz_update: QuizUpdate) -> Quiz:
+    """Update a quiz without committing, so callers can batch several writes."""
+    payload = quiz_update.model_dump(exclude_unset=True)
+    if payload:
+        stmt = update(Quiz).where(Quiz.id == quiz_id).values(**payload).returning(Quiz)
+        quiz = db.scalar(stmt)
+    else:
+        quiz = db.get(Quiz, quiz_id)
+    if quiz is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    change_feed.record_quiz_change(db, quiz.profile_id, quiz.id, change_feed.UPSERT)
+    return quiz
 
 
 def _ensure_profile_exists(db: Session, profile_id: str) -> None:
@@ -115,21 +317,49 @@ def _ensure_profile_exists(db: Session, profile_id: str) -> None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
 
 
-def _fetch_quizzes_for_profile(db: Session, profile_id: str) -> List[Quiz]:
+def _require_pack(db: Session, packs: QuizPackStore, quiz_id: str) -> QuizPack:
+    pack = packs.load(db, quiz_id)
+    if pack is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    return pack
+
+
+def fetch_quiz_summary_rows(db: Session, profile_id: str) -> Sequence[Row]:
+    """Load quiz summaries with question counts in one grouped query."""
     stmt = (
-        select(Quiz)
+        select(
+            Quiz.id,
+            Quiz.title,
+            Quiz.description,
+            Quiz.created_at,
+            func.count(Question.id).label("question_count"),
+        )
+        .outerjoin(Question, Question.quiz_id == Quiz.id)
         .where(Quiz.profile_id == profile_id)
-        .options(selectinload(Quiz.questions))
+        .group_by(Quiz.id)
         .order_by(Quiz.created_at)
     )
-    return db.scalars(stmt).all()
+    return db.execute(stmt).all()
+
+
+def quiz_summary_from_row(row: Row) -> QuizSummary:
+    return QuizSummary(
+        id=row.id,
+        title=row.title,
+        description=row.description,
+        question_count=row.question_count,
+        created_at=row.created_at,
+    )
 
 
-def _fetch_quiz_with_questions(db: Session, quiz_id: str) -> Quiz:
+def _fetch_quiz_with_questions(db: Session, quiz_id: str, with_attachments: bool = False) -> Quiz:
+    questions_loader = selectinload(Quiz.questions)
+    if with_attachments:
+        questions_loader = questions_loader.selectinload(Question.attachments)
     stmt = (
         select(Quiz)
         .where(Quiz.id == quiz_id)
-        .options(selectinload(Quiz.questions))
+        .options(questions_loader)
     )
     quiz = db.scalars(stmt).first()
     if quiz is None:
@@ -1,19 +1,34 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db_session, get_session_manager
-from app.models import Question, Quiz
+from app.api.deps import get_db_session, get_idempotency_cache, get_quiz_pack_store, get_session_manager
+from app.core.config import Settings, get_settings
+from app.db.query_counter import query_budget
 from app.schemas.session import (
     QuestionResolution,
     SessionCreate,
     SessionRead,
+    VoteCast,
+    VoteReceipt,
+    VoteTallyRead,
 )
+from app.services.audience import VoteTally, VotingClosed
+from app.services.idempotency import IdempotencyCache, IdempotencyKeyConflict
+from app.services.quiz_pack import PackedQuestion, QuizPack, QuizPackStore
 from app.services.session_manager import SessionManager, SessionState
 
 router = APIRouter(prefix="/api/v1/sessions", tags=["sessions"])
 
+_STREAM_HEARTBEAT_SECONDS = 5.0
+
 
 def _session_to_schema(state: SessionState) -> SessionRead:
     return SessionRead(
@@ -25,16 +40,36 @@ def _session_to_schema(state: SessionState) -> SessionRead:
         question_started_at=state.question_started_at,
         current_turn_index=state.current_turn_index,
         timer_seconds=state.timer_seconds,
+        audience_mode=state.audience_mode,
+        audience_tally=_tally_to_schema(state.last_tally) if state.last_tally else None,
     )
 
 
-def _ensure_quiz_exists(db: Session, quiz_id: str) -> None:
-    if db.get(Quiz, quiz_id) is None:
+def _tally_to_schema(tally: VoteTally) -> VoteTallyRead:
+    return VoteTallyRead(
+        question_id=tally.question_id,
+        counts=tally.counts,
+        total=tally.total,
+        version=tally.version,
+        closed=tally.closed,
+    )
+
+
+def _require_pack(db: Session, packs: QuizPackStore, quiz_id: str) -> QuizPack:
+    pack = packs.load(db, quiz_id)
+    if pack is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    return pack
 
 
-def _require_question(db: Session, question_id: str) -> Question:
-    question = db.get(Question, question_id)
+def _require_question(
+    db: Session, packs: QuizPackStore, manager: SessionManager, session_id: str, question_id: str
+) -> PackedQuestion:
+    """Look the question up in the pack of the session's quiz, not in the database."""
+    state = manager.get_session(session_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Session not found")
+    question = _require_pack(db, packs, state.quiz_id).question(question_id)
     if question is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
     return question
@@ -44,25 +79,61 @@ def _resolve_session(state: SessionState) -> SessionRead:
     return _session_to_schema(state)
 
 
+def _run_idempotent(
+    cache: IdempotencyCache,
+    idempotency_key: Optional[str],
+    response: Response,
+    scope: str,
+    request_data: Any,
+    producer: Callable[[], SessionRead],
+) -> SessionRead:
+    if not idempotency_key:
+        return producer()
+
+    fingerprint = hashlib.sha256(
+        json.dumps([scope, request_data], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    try:
+        result, replayed = cache.run(f"{scope}:{idempotency_key}", fingerprint, producer)
+    except IdempotencyKeyConflict as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
 @router.post("/", response_model=SessionRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 def create_session(
     payload: SessionCreate,
+    response: Response,
     db: Session = Depends(get_db_session),
     manager: SessionManager = Depends(get_session_manager),
+    packs: QuizPackStore = Depends(get_quiz_pack_store),
+    cache: IdempotencyCache = Depends(get_idempotency_cache),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ) -> SessionRead:
-    _ensure_quiz_exists(db, payload.quiz_id)
-    try:
-        state = manager.create_session(
-            payload.quiz_id, 
-            [team.name for team in payload.teams],
-            timer_seconds=payload.timer_seconds or 20
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    return _session_to_schema(state)
+    def produce() -> SessionRead:
+        # Maps the quiz's pack, so the game's board loads without touching the database
+        _require_pack(db, packs, payload.quiz_id)
+        try:
+            state = manager.create_session(
+                payload.quiz_id, 
+                [team.name for team in payload.teams],
+                timer_seconds=payload.timer_seconds or 20,
+                audience_mode=payload.audience_mode,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        return _session_to_schema(state)
+
+    return _run_idempotent(
+        cache, idempotency_key, response, "create", payload.model_dump(mode="json"), produce
+    )
 
 
 @router.get("/{session_id}", response_model=SessionRead)
+@query_budget(0)
 def get_session(
     session_id: str,
     manager: SessionManager = Depends(get_session_manager),
@@ -77,60 +148,169 @@ def get_session(
     "/{session_id}/question/{question_id}/start",
     response_model=SessionRead,
 )
+@query_budget(3)
 def start_question(
     session_id: str,
     question_id: str,
+    response: Response,
     db: Session = Depends(get_db_session),
     manager: SessionManager = Depends(get_session_manager),
+    packs: QuizPackStore = Depends(get_quiz_pack_store),
+    cache: IdempotencyCache = Depends(get_idempotency_cache),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ) -> SessionRead:
-    _require_question(db, question_id)
-    try:
-        state = manager.start_question(session_id, question_id)
-    except (KeyError, ValueError) as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    return _session_to_schema(state)
+    def produce() -> SessionRead:
+        question = _require_question(db, packs, manager, session_id, question_id)
+        try:
+            state = manager.start_question(session_id, question_id, option_count=question.option_count)
+        except (KeyError, ValueError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        return _session_to_schema(state)
+
+    return _run_idempotent(
+        cache, idempotency_key, response, f"start:{session_id}", [question_id], produce
+    )
 
 
 @router.post(
     "/{session_id}/question/{question_id}/resolve",
     response_model=SessionRead,
 )
+@query_budget(3)
 def resolve_question(
     session_id: str,
     question_id: str,
     resolution: QuestionResolution,
+    response: Response,
     db: Session = Depends(get_db_session),
     manager: SessionManager = Depends(get_session_manager),
+    packs: QuizPackStore = Depends(get_quiz_pack_store),
+    cache: IdempotencyCache = Depends(get_idempotency_cache),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ) -> SessionRead:
-    question = _require_question(db, question_id)
-    if resolution.team_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="team_id required")
-    try:
-        state = manager.resolve_question(
-            session_id,
-            question_id,
-            resolution.team_id,
-            resolution.outcome,
-            points=question.points,
-            steal_attempt=resolution.steal_attempt.model_dump() if resolution.steal_attempt else None,
-        )
-    except (KeyError, ValueError) as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    def produce() -> SessionRead:
+        question = _require_question(db, packs, manager, session_id, question_id)
+        if resolution.team_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="team_id required")
+        try:
+            state = manager.resolve_question(
+                session_id,
+                question_id,
+                resolution.team_id,
+                resolution.outcome,
+                points=question.points,
+                steal_attempt=resolution.steal_attempt.model_dump() if resolution.steal_attempt else None,
+                correct_index=question.correct_index,
+            )
+        except (KeyError, ValueError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+        return _resolve_session(state)
 
-    return _resolve_session(state)
+    return _run_idempotent(
+        cache,
+        idempotency_key,
+        response,
+        f"resolve:{session_id}",
+        [question_id, resolution.model_dump(mode="json")],
+        produce,
+    )
 
 
 @router.post(
     "/{session_id}/turn/{team_index}",
     response_model=SessionRead,
 )
+@query_budget(0)
 def set_active_turn(
     session_id: str,
     team_index: int,
+    response: Response,
     manager: SessionManager = Depends(get_session_manager),
+    cache: IdempotencyCache = Depends(get_idempotency_cache),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ) -> SessionRead:
+    def produce() -> SessionRead:
+        try:
+            state = manager.set_active_turn(session_id, team_index)
+        except (KeyError, ValueError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        return _session_to_schema(state)
+
+    return _run_idempotent(
+        cache, idempotency_key, response, f"turn:{session_id}", [team_index], produce
+    )
+
+
+@router.post("/{session_id}/votes", response_model=VoteReceipt, status_code=status.HTTP_202_ACCEPTED)
+@query_budget(0)
+def cast_vote(
+    session_id: str,
+    vote: VoteCast,
+    manager: SessionManager = Depends(get_session_manager),
+) -> VoteReceipt:
+    """Record an audience device's answer; repeat votes are acknowledged but not counted."""
     try:
-        state = manager.set_active_turn(session_id, team_index)
+        accepted = manager.cast_vote(session_id, vote.question_id, vote.device_id, vote.answer_index)
+    except VotingClosed as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     except (KeyError, ValueError) as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    return _session_to_schema(state)
+    return VoteReceipt(question_id=vote.question_id, accepted=accepted)
+
+
+@router.get("/{session_id}/votes", response_model=Optional[VoteTallyRead])
+@query_budget(0)
+def get_vote_tally(
+    session_id: str,
+    manager: SessionManager = Depends(get_session_manager),
+) -> Optional[VoteTallyRead]:
+    try:
+        tally = manager.current_tally(session_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found") from exc
+    return _tally_to_schema(tally) if tally else None
+
+
+@router.get("/{session_id}/votes/stream")
+@query_budget(0)
+async def stream_vote_tally(
+    session_id: str,
+    request: Request,
+    manager: SessionManager = Depends(get_session_manager),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    """Server-sent events with the live tally, at most one per push interval.
+
+    An event is only sent when the tally changed since the last one, so a quiet
+    room costs nothing but the wake-ups; the stream ends with the session.
+    """
+    if manager.get_session(session_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    async def events() -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        last_sent = None
+        last_write = loop.time()
+        while not await request.is_disconnected():
+            try:
+                tally = manager.current_tally(session_id)
+            except KeyError:
+                return
+            marker = (tally.question_id, tally.version, tally.closed) if tally else None
+            if marker is not None and marker != last_sent:
+                last_sent = marker
+                last_write = loop.time()
+                payload = _tally_to_schema(tally).model_dump_json()
+                yield f"event: tally\ndata: {payload}\n\n".encode("utf-8")
+            elif loop.time() - last_write >= _STREAM_HEARTBEAT_SECONDS:
+                # Keeps idle streams alive through proxies and the shard router
+                last_write = loop.time()
+                yield b": keepalive\n\n"
+            await asyncio.sleep(settings.audience_push_interval_seconds)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
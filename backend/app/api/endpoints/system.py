@@ -1,18 +1,28 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from dataclasses import asdict
+from typing import Any
 
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_maintenance_service, get_memory_tracer, require_admin
 from app.core.config import Settings, get_settings
+from app.core.profiling import MemoryTracer
+from app.db.query_counter import query_budget
+from app.services.maintenance import MaintenanceService
 
 router = APIRouter(prefix="/api/v1/system", tags=["system"])
 
 
 @router.get("/health")
+@query_budget(0)
 def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @router.get("/config")
+@query_budget(0)
 def get_config(settings: Settings = Depends(get_settings)) -> dict[str, int | float]:
     return {
         "primary_timer_seconds": settings.primary_timer_seconds,
@@ -21,3 +31,78 @@ def get_config(settings: Settings = Depends(get_settings)) -> dict[str, int | fl
         "min_teams": settings.min_teams,
         "max_teams": settings.max_teams,
     }
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+@query_budget(0)
+def get_request_profile(profile_id: str, settings: Settings = Depends(get_settings)) -> str:
+    path = settings.profiling_dir / profile_id
+    if path.parent != settings.profiling_dir or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return path.read_text(encoding="utf-8")
+
+
+@router.post(
+    "/tracemalloc/start",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin)],
+)
+@query_budget(0)
+def start_tracemalloc(frames: int = 10, tracer: MemoryTracer = Depends(get_memory_tracer)) -> Response:
+    tracer.start(frames)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/tracemalloc/snapshot", dependencies=[Depends(require_admin)])
+@query_budget(0)
+def tracemalloc_snapshot(
+    limit: int = 25,
+    tracer: MemoryTracer = Depends(get_memory_tracer),
+) -> dict[str, Any]:
+    try:
+        return tracer.snapshot(limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@router.get("/tracemalloc/diff", dependencies=[Depends(require_admin)])
+@query_budget(0)
+def tracemalloc_diff(
+    limit: int = 25,
+    reset_baseline: bool = False,
+    tracer: MemoryTracer = Depends(get_memory_tracer),
+) -> dict[str, Any]:
+    try:
+        return tracer.diff(limit, reset_baseline=reset_baseline)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@router.post(
+    "/tracemalloc/stop",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin)],
+)
+@query_budget(0)
+def stop_tracemalloc(tracer: MemoryTracer = Depends(get_memory_tracer)) -> Response:
+    tracer.stop()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/maintenance", dependencies=[Depends(require_admin)])
+# Two size probes, four orphan sweeps, one media listing, VACUUM and ANALYZE
+@query_budget(11)
+def run_maintenance(service: MaintenanceService = Depends(get_maintenance_service)) -> dict[str, Any]:
+    return asdict(service.run())
+
+
+@router.get("/maintenance", dependencies=[Depends(require_admin)])
+@query_budget(0)
+def get_last_maintenance(service: MaintenanceService = Depends(get_maintenance_service)) -> dict[str, Any]:
+    if service.last_report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Maintenance has not run yet")
+    return asdict(service.last_report)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Collection, Deque, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.client_address import client_address
+
+_SESSIONS_PREFIX = "/api/v1/sessions/"
+_STREAM_SUFFIX = "/stream"
+# Votes and tally reads from a whole room, often behind one NAT address
+_AUDIENCE_SUFFIXES = ("/votes", "/votes/stream")
+_READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def try_acquire(self, now: float) -> float:
+        """Take one token; return 0 on success or the seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class TokenBucketMap:
+    """Token buckets keyed by an arbitrary string, bounded to ``max_keys`` entries."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10_000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def try_acquire(self, key: str, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire(now)
+
+
+class AdmissionMiddleware:
+    """Rate-limit and admit API requests before they reach the threadpool.
+
+    Every client gets a token bucket, keyed on its address as reported by
+    :func:`client_address`; a request whose address cannot be told (a unix
+    socket peer that sent no ``X-Forwarded-For``) skips the per-client bucket
+    rather than sharing one with every other such request. Polling reads of a
+    live session share a per-session bucket. Votes and tally reads of a live
+    audience-mode session, as told by ``is_audience_session``, come from a
+    whole classroom that usually shares one address: they draw on a larger
+    per-client audience bucket plus a per-session one instead. Any other
+    session id gets the ordinary limits, so made-up ids cannot mint buckets.
+    Admitted requests then compete for a fixed number of concurrency slots;
+    session mutations jump ahead of reads in the wait queue, and requests are
+    shed with 503 once the queue is too deep or they wait longer than
+    ``queue_timeout``. All state lives on the event loop, so no locking is
+    needed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = 32,
+        max_queue_depth: int = 64,
+        read_queue_depth: int = 16,
+        queue_timeout: float = 2.0,
+        client_rate: float = 20.0,
+        client_burst: float = 40.0,
+        session_poll_rate: float = 4.0,
+        session_poll_burst: float = 8.0,
+        audience_rate: float = 500.0,
+        audience_burst: float = 2000.0,
+        audience_client_rate: float = 50.0,
+        audience_client_burst: float = 200.0,
+        trusted_proxies: Collection[str] = ("127.0.0.1", "::1"),
+        is_audience_session: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.read_queue_depth = read_queue_depth
+        self.queue_timeout = queue_timeout
+        self.trusted_proxies = frozenset(trusted_proxies)
+        self.is_audience_session = is_audience_session
+        self._client_buckets = TokenBucketMap(client_rate, client_burst)
+        self._session_buckets = TokenBucketMap(session_poll_rate, session_poll_burst)
+        self._audience_buckets = TokenBucketMap(audience_rate, audience_burst)
+        self._audience_client_buckets = TokenBucketMap(audience_client_rate, audience_client_burst)
+        self._active = 0
+        self._priority_waiters: Deque[asyncio.Future[None]] = deque()
+        self._read_waiters: Deque[asyncio.Future[None]] = deque()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method = scope.get("method", "")
+        if scope["type"] != "http" or method == "OPTIONS" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        is_read = method in _READ_METHODS
+        now = time.monotonic()
+        session_id = _session_id(scope["path"])
+        client = client_address(scope, self.trusted_proxies)
+        if self._is_audience_request(scope["path"], session_id):
+            client_buckets, session_buckets = self._audience_client_buckets, self._audience_buckets
+        else:
+            client_buckets = self._client_buckets
+            session_buckets = self._session_buckets if is_read else None
+        retry_after = client_buckets.try_acquire(client, now) if client is not None else 0.0
+        if not retry_after and session_id and session_buckets is not None:
+            retry_after = session_buckets.try_acquire(session_id, now)
+        if retry_after:
+            await _reject(scope, receive, send, 429, "Too many requests", retry_after)
+            return
+
+        if scope["path"].endswith(_STREAM_SUFFIX):
+            # Long-lived event streams would pin a slot for their whole life;
+            # they are rate limited above but not counted against concurrency.
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._acquire(priority=not is_read):
+            await _reject(scope, receive, send, 503, "Server is busy", self.queue_timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    def _is_audience_request(self, path: str, session_id: Optional[str]) -> bool:
+        return (
+            session_id is not None
+            and path.endswith(_AUDIENCE_SUFFIXES)
+            and self.is_audience_session is not None
+            and self.is_audience_session(session_id)
+        )
+
+    async def _acquire(self, *, priority: bool) -> bool:
+        queued = len(self._priority_waiters) + len(self._read_waiters)
+        if self._active < self.max_concurrency and not queued:
+            self._active += 1
+            return True
+
+        if queued >= (self.max_queue_depth if priority else self.read_queue_depth):
+            return False
+
+        waiters = self._priority_waiters if priority else self._read_waiters
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on.
+                self._release()
+            else:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return False
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, mutations first.
+        for waiters in (self._priority_waiters, self._read_waiters):
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+
+
+def _session_id(path: str) -> Optional[str]:
+    if not path.startswith(_SESSIONS_PREFIX):
+        return None
+    return path[len(_SESSIONS_PREFIX):].split("/", 1)[0] or None
+
+
+async def _reject(
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+    status_code: int,
+    detail: str,
+    retry_after: float,
+) -> None:
+    response = JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+    await response(scope, receive, send)
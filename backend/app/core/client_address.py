@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Collection, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import Scope
+
+FORWARDED_FOR_HEADER = "x-forwarded-for"
+
+
+def client_address(scope: Scope, trusted_proxies: Collection[str]) -> Optional[str]:
+    """The address of the client behind any trusted proxies, or None if it cannot be told.
+
+    A peer on a unix socket (uvicorn ``--uds`` leaves ``client`` unset) can
+    only be a local proxy, so like peers listed in ``trusted_proxies`` its
+    ``X-Forwarded-For`` is believed. The chain is read from the right,
+    skipping trusted hops, so a client cannot spoof its way past the proxies
+    by sending the header itself.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    if peer is not None and peer not in trusted_proxies:
+        return peer
+    hops = forwarded_for(Headers(scope=scope))
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return hops[0] if hops else peer
+
+
+def forwarded_for(headers: Headers) -> List[str]:
+    return [hop.strip() for value in headers.getlist(FORWARDED_FOR_HEADER) for hop in value.split(",") if hop.strip()]
@@ -1,5 +1,7 @@
+import tempfile
 from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -14,6 +16,62 @@ class Settings(BaseSettings):
     steal_points_factor: float = 0.5
     min_teams: int = 2
     max_teams: int = 4
+    audience_vote_shards: int = 16
+    audience_push_interval_seconds: float = 0.5
+    media_root: Path = Path(__file__).resolve().parent.parent / "media"
+    media_max_bytes: int = 10 * 1024 * 1024
+    media_variant_widths: List[int] = [320, 640, 1280]
+    compression_minimum_size: int = 500
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    idempotency_cache_size: int = 1024
+    idempotency_ttl_seconds: float = 600.0
+    admission_max_concurrency: int = 32
+    admission_max_queue_depth: int = 64
+    admission_read_queue_depth: int = 16
+    admission_queue_timeout_seconds: float = 2.0
+    # Peers whose X-Forwarded-For names the real client; unix-socket peers always count
+    trusted_proxies: List[str] = ["127.0.0.1", "::1"]
+    rate_limit_client_per_second: float = 20.0
+    rate_limit_client_burst: float = 40.0
+    rate_limit_session_poll_per_second: float = 4.0
+    rate_limit_session_poll_burst: float = 8.0
+    # Shared by all votes and tally reads of one session
+    rate_limit_audience_per_second: float = 500.0
+    rate_limit_audience_burst: float = 2000.0
+    # Votes and tally reads per client address, which may be a whole classroom behind NAT
+    rate_limit_audience_client_per_second: float = 50.0
+    rate_limit_audience_client_burst: float = 200.0
+    admin_token: Optional[str] = None
+    profiling_dir: Path = Path(tempfile.gettempdir()) / "peace_cake_profiles"
+    profiling_sample_interval: float = 0.005
+    # "off", "warn" or "strict"; strict raises so a TestClient suite fails
+    query_budget_mode: str = "off"
+    query_repeat_threshold: int = 2
+    # Run one uvicorn process per shard with --uds <shard_socket_dir>/worker-<index>.sock
+    shard_count: int = 1
+    shard_index: int = 0
+    shard_slot_count: int = 1024
+    shard_socket_dir: Path = Path(tempfile.gettempdir()) / "peace_cake_shards"
+    # Fraction of requests traced into <tracing_dir>/traces.jsonl; 0 disables tracing
+    tracing_sample_rate: float = 0.0
+    tracing_dir: Path = Path(tempfile.gettempdir()) / "peace_cake_traces"
+    tracing_max_bytes: int = 10 * 1024 * 1024
+    tracing_backup_count: int = 5
+    # Record sanitised traffic plus a startup snapshot into this directory; unset disables it
+    traffic_capture_dir: Optional[Path] = None
+    traffic_capture_max_body_bytes: int = 64 * 1024
+    # Start with the sessions snapshotted in this capture (set by scripts/replay_traffic.py)
+    traffic_replay_capture: Optional[Path] = None
+    # Precompiled quiz packs, shared by every worker process on the host
+    quiz_pack_dir: Path = Path(tempfile.gettempdir()) / "peace_cake_packs"
+    # Packs kept memory-mapped per process; each map holds a file descriptor
+    quiz_pack_max_maps: int = 256
+    # Background job workers per process; 0 runs heavy operations inline only
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 1.0
+    # 0 disables the background task; POST /system/maintenance still runs it on demand
+    maintenance_interval_seconds: int = 0
 
     class Config:
         env_prefix = "PEACE_"
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from fastapi import Request, Response, status
+
+# Editor and host screens must never show a stale board, so reads are always
+# revalidated; the ETag makes that revalidation a cheap 304.
+QUIZ_CACHE_CONTROL = "private, no-cache"
+QUESTIONS_CACHE_CONTROL = "private, no-cache"
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from the version markers of a resource."""
+    normalised = "|".join(_normalise(part) for part in parts)
+    digest = hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = (candidate.strip() for candidate in header.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control)
+    return response
+
+
+def _normalise(part: object) -> str:
+    if part is None:
+        return ""
+    if isinstance(part, datetime):
+        return part.isoformat()
+    return str(part)
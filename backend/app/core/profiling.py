@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def admin_token_valid(expected: Optional[str], provided: Optional[str]) -> bool:
+    if not expected or not provided:
+        return False
+    return hmac.compare_digest(expected.encode("utf-8"), provided.encode("utf-8"))
+
+
+class StackSampler:
+    """Pure-Python sampling profiler producing folded stacks.
+
+    Sync routes run on threadpool workers, so the sampler walks every thread and
+    keeps only stacks that pass through application code. Concurrent requests
+    touching the same code paths will show up in the same profile.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    self.samples[stack] += 1
+
+
+class ProfilingMiddleware:
+    """Profile individual requests that ask for it with ``X-Profile: 1``.
+
+    The request must also carry a valid ``X-Admin-Token``. Folded stacks (the
+    input format of flamegraph.pl and speedscope) are written to ``output_dir``
+    and the file name is returned in the ``X-Profile-Id`` header. The middleware
+    is only installed when an admin token is configured.
+    """
+
+    def __init__(self, app: ASGIApp, admin_token: str, output_dir: Path, interval: float = 0.005) -> None:
+        self.app = app
+        self.admin_token = admin_token
+        self.output_dir = output_dir
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") != "1" or not admin_token_valid(
+            self.admin_token, headers.get("x-admin-token")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}.folded"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            header = f"# {scope['method']} {scope['path']}\n"
+            (self.output_dir / profile_id).write_text(header + sampler.folded(), encoding="utf-8")
+
+
+class MemoryTracer:
+    """Start/stop ``tracemalloc`` on demand and diff snapshots against a baseline."""
+
+    def __init__(self) -> None:
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._take()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._baseline = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    def snapshot(self, limit: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            self._require_tracing()
+            current, peak = tracemalloc.get_traced_memory()
+            stats = self._take().statistics("lineno")[:limit]
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"location": _format_trace(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in stats
+            ],
+        }
+
+    def diff(self, limit: int = 25, reset_baseline: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            self._require_tracing()
+            current = self._take()
+            assert self._baseline is not None
+            stats = current.compare_to(self._baseline, "lineno")[:limit]
+            if reset_baseline:
+                self._baseline = current
+        return {
+            "top": [
+                {
+                    "location": _format_trace(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                }
+                for stat in stats
+            ]
+        }
+
+    def _require_tracing(self) -> None:
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            raise ValueError("tracemalloc is not running")
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+
+def _collapse(frame: Any) -> Optional[str]:
+    names: List[str] = []
+    in_app = False
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(_APP_ROOT):
+            in_app = True
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    if not in_app:
+        return None
+    return ";".join(reversed(names))
+
+
+def _format_trace(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
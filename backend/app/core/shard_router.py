@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import httpx
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.client_address import FORWARDED_FOR_HEADER, forwarded_for
+from app.services.sharding import ShardMap
+
+_SESSIONS_PREFIX = "/api/v1/sessions/"
+_FORWARDED_HEADER = "x-peace-forwarded"
+_HOP_BY_HOP = frozenset(
+    {"connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade", "host"}
+)
+
+
+class ShardRouter:
+    """Forwards requests to sibling workers over their unix sockets."""
+
+    def __init__(self, shard_map: ShardMap, timeout: float = 10.0) -> None:
+        self.shard_map = shard_map
+        self.timeout = timeout
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    def client_for(self, worker_index: int) -> httpx.AsyncClient:
+        client = self._clients.get(worker_index)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(uds=str(self.shard_map.socket_path(worker_index)))
+            client = httpx.AsyncClient(transport=transport, base_url="http://shard", timeout=self.timeout)
+            self._clients[worker_index] = client
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+class ShardRouterMiddleware:
+    """Route ``/api/v1/sessions/{id}/...`` requests to the worker owning the session.
+
+    Each worker keeps its sessions purely in memory; a request that lands on
+    the wrong worker is proxied once (marked with ``X-Peace-Forwarded``) to the
+    owner's unix socket and its raw response is streamed back unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, router: ShardRouter) -> None:
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(_SESSIONS_PREFIX):
+            session_id = scope["path"][len(_SESSIONS_PREFIX):].split("/", 1)[0]
+            owner = self.router.shard_map.owner_of(session_id) if session_id else None
+            headers = Headers(scope=scope)
+            if (
+                owner is not None
+                and owner != self.router.shard_map.worker_index
+                and _FORWARDED_HEADER not in headers
+            ):
+                await self._forward(owner, scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    async def _forward(self, owner: int, scope: Scope, receive: Receive, send: Send) -> None:
+        body = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            body.extend(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        request_headers = Headers(scope=scope)
+        headers = [
+            (name, value)
+            for name, value in request_headers.raw
+            if name.decode("latin-1") not in _HOP_BY_HOP and name.decode("latin-1") != FORWARDED_FOR_HEADER
+        ]
+        headers.append((_FORWARDED_HEADER.encode("latin-1"), b"1"))
+        # The owner sees this worker as a unix-socket peer; pass on who it was talking to
+        hops = forwarded_for(request_headers)
+        client = scope.get("client")
+        if client:
+            hops.append(client[0])
+        if hops:
+            headers.append((FORWARDED_FOR_HEADER.encode("latin-1"), ", ".join(hops).encode("latin-1")))
+        url = scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+
+        client = self.router.client_for(owner)
+        request = client.build_request(scope["method"], url, headers=headers, content=bytes(body))
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError:
+            unavailable = JSONResponse(
+                {"detail": "Session shard unavailable"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await unavailable(scope, receive, send)
+            return
+
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name, value)
+                        for name, value in response.headers.raw
+                        if name.decode("latin-1").lower() not in _HOP_BY_HOP
+                    ],
+                }
+            )
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_PID = os.getpid()
+_SQL_START_KEY = "trace_sql_start"
+
+
+class Trace:
+    """Spans collected for one sampled request, as Trace Event Format dicts."""
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.events: List[Dict[str, Any]] = []
+
+    def add(self, name: str, category: str, start_ns: int, end_ns: int, args: Optional[dict] = None) -> None:
+        # list.append is atomic, so threadpool workers can record into the same trace
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_ns // 1000,
+                "dur": max(1, (end_ns - start_ns) // 1000),
+                "pid": _PID,
+                "tid": threading.get_ident(),
+                "args": {"trace_id": self.trace_id, **(args or {})},
+            }
+        )
+
+
+@contextmanager
+def span(name: str, category: str = "app", **args: Any) -> Iterator[None]:
+    """Time the enclosed block if the current request is being traced; free otherwise."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add(name, category, start, time.perf_counter_ns(), args)
+
+
+@contextmanager
+def traced_lock(lock: Any, name: str) -> Iterator[None]:
+    """Acquire ``lock`` recording separate spans for waiting on it and holding it."""
+    trace = _current_trace.get()
+    if trace is None:
+        with lock:
+            yield
+        return
+    requested = time.perf_counter_ns()
+    with lock:
+        acquired = time.perf_counter_ns()
+        trace.add(f"{name}.wait", "lock", requested, acquired)
+        try:
+            yield
+        finally:
+            trace.add(f"{name}.hold", "lock", acquired, time.perf_counter_ns())
+
+
+class RotatingTraceWriter:
+    """Append trace events to ``traces.jsonl``, rotating it like ``RotatingFileHandler``.
+
+    Each file starts with ``[`` and every following line is one event followed
+    by a comma. The closing bracket is optional in the Trace Event Format, so a
+    file loads as-is in Perfetto or chrome://tracing, while stripping the comma
+    off each line gives plain JSONL for scripts.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, backup_count: int) -> None:
+        self.path = directory / "traces.jsonl"
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        chunk = "".join(json.dumps(item, separators=(",", ":"), default=str) + ",\n" for item in events)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            size = self.path.stat().st_size if self.path.exists() else 0
+            if size and size + len(chunk) > self.max_bytes:
+                self._rotate()
+                size = 0
+            with self.path.open("a", encoding="utf-8") as handle:
+                if size == 0:
+                    handle.write("[\n")
+                handle.write(chunk)
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+
+class TracingMiddleware:
+    """Trace a random sample of requests and write their spans after the response.
+
+    Sampled responses carry an ``X-Trace-Id`` header that matches the
+    ``trace_id`` argument on every span of that request.
+    """
+
+    def __init__(self, app: ASGIApp, writer: RotatingTraceWriter, sample_rate: float) -> None:
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(uuid.uuid4().hex)
+        token = _current_trace.set(trace)
+        status_code = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Trace-Id"] = trace.trace_id
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.add(
+                f"{scope['method']} {scope['path']}",
+                "request",
+                start,
+                time.perf_counter_ns(),
+                {"status": status_code},
+            )
+            self.writer.write(trace.events)
+
+
+def install_tracing(engine: Engine) -> None:
+    """Add spans around SQL statements and FastAPI's request-handling phases."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _discard_sql_start)
+
+    # FastAPI exposes no hooks between dependency resolution, the endpoint and
+    # response validation, so wrap the module-level helpers its handler calls.
+    from fastapi import routing
+
+    for attr, name in (
+        ("solve_dependencies", "dependencies"),
+        ("run_endpoint_function", "endpoint"),
+        ("serialize_response", "serialize_response"),
+    ):
+        original = getattr(routing, attr)
+        if not getattr(original, "__traced__", False):
+            setattr(routing, attr, _traced_coroutine(original, name))
+
+
+def _traced_coroutine(func: Callable[..., Any], name: str) -> Callable[..., Any]:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with span(name, "fastapi"):
+            return await func(*args, **kwargs)
+
+    wrapper.__traced__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    if _current_trace.get() is not None:
+        conn.info.setdefault(_SQL_START_KEY, []).append(time.perf_counter_ns())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    trace = _current_trace.get()
+    starts = conn.info.get(_SQL_START_KEY)
+    if trace is None or not starts:
+        return
+    trace.add(
+        "sql",
+        "db",
+        starts.pop(),
+        time.perf_counter_ns(),
+        {"statement": " ".join(statement.split())[:300], "executemany": executemany},
+    )
+
+
+def _discard_sql_start(context) -> None:  # noqa: ANN001
+    starts = context.connection.info.get(_SQL_START_KEY) if context.connection is not None else None
+    if starts:
+        starts.pop()
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from app.services.session_manager import SessionManager
+
+FORMAT_VERSION = 1
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+# Everything else, notably Authorization, Cookie and X-Admin-Token, is dropped
+_KEPT_HEADERS = frozenset(
+    {
+        "accept",
+        "accept-encoding",
+        "content-type",
+        "idempotency-key",
+        "if-match",
+        "if-none-match",
+        "prefer",
+    }
+)
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_FLUSH_EVERY = 100
+
+
+class TrafficRecorder:
+    """Write sanitised requests to ``capture-<stamp>-<pid>.jsonl.gz``.
+
+    The first line is a header holding the session manager's state and the
+    name of a SQLite copy of the database, both taken when :meth:`start` runs
+    before the first request. Each following line is one request: its offset
+    from the start in milliseconds, method, path, query, kept headers, JSON
+    body, a pseudonymous client address, status, server-side duration and, for
+    writes, the ids that appeared in the response so a replay can map them to
+    the ones its own run mints.
+    """
+
+    def __init__(self, directory: Path, max_body_bytes: int = 64 * 1024) -> None:
+        self.directory = directory
+        self.max_body_bytes = max_body_bytes
+        self.path: Optional[Path] = None
+        self._file: Optional[gzip.GzipFile] = None
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._clients: Dict[str, str] = {}
+        self._pending = 0
+
+    def start(self, engine: Engine, sessions: "SessionManager") -> None:
+        if self._file is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"capture-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{os.getpid()}"
+        snapshot = self._snapshot_database(engine, self.directory / f"{stem}.db")
+        self.path = self.directory / f"{stem}.jsonl.gz"
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._write(
+            {
+                "version": FORMAT_VERSION,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "database": snapshot.name if snapshot else None,
+                "sessions": sessions.export_sessions(),
+            }
+        )
+        self._file.flush()
+        self._started = time.perf_counter()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def offset_ms(self, moment: float) -> float:
+        return round((moment - self._started) * 1000, 3)
+
+    def client_alias(self, host: str) -> str:
+        """A stable stand-in address per client, usable as ``X-Forwarded-For`` on replay."""
+        with self._lock:
+            alias = self._clients.get(host)
+            if alias is None:
+                number = len(self._clients) + 1
+                alias = f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+                self._clients[host] = alias
+            return alias
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._write(entry)
+            self._pending += 1
+            if self._pending >= _FLUSH_EVERY:
+                self._file.flush()
+                self._pending = 0
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+
+    @staticmethod
+    def _snapshot_database(engine: Engine, target: Path) -> Optional[Path]:
+        # Only SQLite can be copied consistently from here; other databases are
+        # expected to be restored from their own dumps before a replay.
+        if engine.dialect.name != "sqlite":
+            return None
+        source = engine.raw_connection()
+        try:
+            destination = sqlite3.connect(target)
+            try:
+                source.driver_connection.backup(destination)
+            finally:
+                destination.close()
+        finally:
+            source.close()
+        return target
+
+
+class TrafficCaptureMiddleware:
+    """Record every HTTP request with its timing through a :class:`TrafficRecorder`.
+
+    Installed outside admission control so rejected requests are captured too,
+    and inside compression so response bodies are read uncompressed. Request
+    bodies are kept only when they are JSON and at most ``max_body_bytes``;
+    other bodies are recorded by size alone and skipped on replay.
+    """
+
+    def __init__(self, app: ASGIApp, recorder: TrafficRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recorder = self.recorder
+        headers = Headers(scope=scope)
+        keep_body = "json" in headers.get("content-type", "")
+        body = bytearray()
+        body_size = 0
+        status_code = 0
+        response_type = ""
+        response_body = bytearray()
+        collect_ids = scope["method"] not in _READ_METHODS
+        buffered: List[Message] = []
+
+        if keep_body:
+            # Read JSON bodies up front: requests rejected before the endpoint
+            # reads them (429s, 405s) still need their body for replay.
+            more_body = True
+            while more_body and body_size <= recorder.max_body_bytes:
+                message = await receive()
+                buffered.append(message)
+                if message["type"] != "http.request":
+                    break
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                body.extend(chunk)
+                more_body = message.get("more_body", False)
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_size
+            if buffered:
+                return buffered.pop(0)
+            message = await receive()
+            if message["type"] == "http.request":
+                body_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_type = Headers(raw=message.get("headers", [])).get("content-type", "")
+            elif message["type"] == "http.response.body" and collect_ids and "json" in response_type:
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            finished = time.perf_counter()
+            client = scope.get("client")
+            entry: Dict[str, Any] = {
+                "t": recorder.offset_ms(start),
+                "m": scope["method"],
+                "p": scope["path"],
+                "q": scope.get("query_string", b"").decode("latin-1"),
+                "h": {name: value for name, value in headers.items() if name in _KEPT_HEADERS},
+                "b": body.decode("utf-8", "replace") if keep_body and body_size <= recorder.max_body_bytes else None,
+                "bs": body_size,
+                "c": recorder.client_alias(client[0] if client else ""),
+                "s": status_code,
+                "d": round((finished - start) * 1000, 3),
+            }
+            if response_type.startswith("text/event-stream"):
+                entry["sse"] = True
+            if response_body:
+                entry["ids"] = list(dict.fromkeys(UUID_PATTERN.findall(response_body.decode("utf-8", "replace"))))
+            recorder.record(entry)
+
+
+def read_capture(path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Load a capture's header and requests, tolerating a tail cut off by a crash."""
+    header: Optional[Dict[str, Any]] = None
+    requests: List[Dict[str, Any]] = []
+    for line in _read_lines(path):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        if header is None:
+            header = item
+        else:
+            requests.append(item)
+    if header is None or header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} traffic capture")
+    return header, requests
+
+
+def seed_sessions(path: Path, sessions: "SessionManager") -> None:
+    """Restore the session manager to the state recorded in a capture's header.
+
+    Question start times are shifted by the time since the capture began, so
+    timers and voting windows are as open as they were when recording started.
+    """
+    header, _ = read_capture(path)
+    shift = datetime.now(timezone.utc) - datetime.fromisoformat(header["started_at"])
+    snapshots = []
+    for snapshot in header["sessions"]:
+        started_at = snapshot.get("question_started_at")
+        if started_at:
+            snapshot = {**snapshot, "question_started_at": (datetime.fromisoformat(started_at) + shift).isoformat()}
+        snapshots.append(snapshot)
+    sessions.restore_sessions(snapshots)
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        try:
+            yield from handle
+        except (EOFError, gzip.BadGzipFile):
+            return
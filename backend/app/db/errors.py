@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE for foreign_key_violation, reported by the PostgreSQL drivers
+_FOREIGN_KEY_VIOLATION = "23503"
+
+
+def is_foreign_key_violation(exc: IntegrityError) -> bool:
+    """Whether ``exc`` was raised by a foreign key, as opposed to NOT NULL, CHECK or UNIQUE."""
+    orig = exc.orig
+    if getattr(orig, "pgcode", None) == _FOREIGN_KEY_VIOLATION:
+        return True
+    if getattr(orig, "sqlstate", None) == _FOREIGN_KEY_VIOLATION:
+        return True
+    # SQLite only reports the constraint kind in the message
+    return "FOREIGN KEY constraint failed" in str(orig)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_BUDGET_ATTR = "__query_budget__"
+_PER_ITEM_ATTR = "__query_budget_per_item__"
+_current_log: ContextVar[Optional["QueryLog"]] = ContextVar("query_log", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a route runs more statements than it declared."""
+
+
+class QueryLog:
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.items = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 1) -> Dict[str, int]:
+        """Statements executed more than ``threshold`` times, the usual signature of an N+1 load."""
+        return {sql: n for sql, n in Counter(self.statements).items() if n > threshold}
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Record every SQL statement executed in the current context.
+
+    Threadpool workers inherit the caller's context, so statements issued by
+    sync routes and dependencies are attributed to the enclosing request.
+    """
+    log = QueryLog()
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def query_budget(max_statements: int, per_item: int = 0) -> Callable[[F], F]:
+    """Declare the maximum number of statements a route may execute.
+
+    Routes that run a variable number of operations declare ``per_item`` and
+    report how many they run with :func:`count_budget_items`; the budget is
+    then ``max_statements + per_item * items``.
+    """
+
+    def decorator(func: F) -> F:
+        setattr(func, _BUDGET_ATTR, max_statements)
+        setattr(func, _PER_ITEM_ATTR, per_item)
+        return func
+
+    return decorator
+
+
+def get_query_budget(endpoint: Any, items: int = 0) -> Optional[int]:
+    budget = getattr(endpoint, _BUDGET_ATTR, None)
+    if budget is None:
+        return None
+    return budget + getattr(endpoint, _PER_ITEM_ATTR, 0) * items
+
+
+def count_budget_items(items: int) -> None:
+    """Tell the current request's budget check how many operations the route runs."""
+    log = _current_log.get()
+    if log is not None:
+        log.items += items
+
+
+def install_query_counter(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _record_statement):
+        event.listen(engine, "before_cursor_execute", _record_statement)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    log = _current_log.get()
+    if log is not None:
+        log.statements.append(statement)
+
+
+class QueryBudgetMiddleware:
+    """Check each request against its route's ``query_budget``.
+
+    In ``warn`` mode violations are logged; in ``strict`` mode they raise
+    :class:`QueryBudgetExceeded`, which makes a TestClient-driven suite fail.
+    """
+
+    def __init__(self, app: ASGIApp, strict: bool = False, repeat_threshold: int = 2) -> None:
+        self.app = app
+        self.strict = strict
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as log:
+            await self.app(scope, receive, send)
+
+        endpoint = scope.get("endpoint")
+        budget = get_query_budget(endpoint, log.items)
+        problems: List[str] = []
+        if budget is not None and log.count > budget:
+            problems.append(
+                f"{endpoint.__name__} ran {log.count} statements, budget is {budget}"
+            )
+        # Each counted operation may run the same statements once
+        for sql, times in log.repeated(max(self.repeat_threshold, log.items)).items():
+            problems.append(f"statement repeated {times}x: {' '.join(sql.split())[:200]}")
+        if not problems:
+            return
+
+        message = f"{scope['method']} {scope['path']}: " + "; ".join(problems)
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
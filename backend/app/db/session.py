@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import get_settings
@@ -54,7 +54,23 @@ else:
         connect_args={"check_same_thread": False},
         future=True,
     )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        # SQLite ignores ON DELETE CASCADE unless this is set on every connection
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Write endpoints get server-generated columns back via RETURNING, so there is
+# nothing to reload after commit.
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    future=True,
+)
 
 Base = declarative_base()
 
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table: Table) -> Any:
+    """An INSERT supporting ``on_conflict_do_*`` on the session's backend.
+
+    ON CONFLICT is spelled the same on SQLite and Postgres, but SQLAlchemy
+    only offers it through their dialect-specific constructs.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(table)
+    return postgresql_insert(table)
@@ -3,25 +3,132 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.endpoints import profiles, questions, quizzes, sessions, system
-from app.db.session import create_all_tables
+from app.api.deps import get_job_queue, get_maintenance_service, get_quiz_pack_store, get_session_manager
+from app.api.endpoints import batch, jobs, media, profiles, questions, quizzes, sessions, system
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.config import get_settings
+from app.core.profiling import ProfilingMiddleware
+from app.core.shard_router import ShardRouter, ShardRouterMiddleware
+from app.core.traffic_capture import TrafficCaptureMiddleware, TrafficRecorder, seed_sessions
+from app.core.tracing import RotatingTraceWriter, TracingMiddleware, install_tracing
+from app.db.query_counter import QueryBudgetMiddleware, install_query_counter
+from app.db.session import create_all_tables, engine
+from app.services.sharding import ShardMap
+
+settings = get_settings()
 
 app = FastAPI(title="Peace Cake API")
 
 origins = ["*"]
 
+if settings.query_budget_mode != "off":
+    install_query_counter(engine)
+    app.add_middleware(
+        QueryBudgetMiddleware,
+        strict=settings.query_budget_mode == "strict",
+        repeat_threshold=settings.query_repeat_threshold,
+    )
+
+# Added before CORS so that 429/503 rejections still carry CORS headers.
+app.add_middleware(
+    AdmissionMiddleware,
+    max_concurrency=settings.admission_max_concurrency,
+    max_queue_depth=settings.admission_max_queue_depth,
+    read_queue_depth=settings.admission_read_queue_depth,
+    queue_timeout=settings.admission_queue_timeout_seconds,
+    client_rate=settings.rate_limit_client_per_second,
+    client_burst=settings.rate_limit_client_burst,
+    session_poll_rate=settings.rate_limit_session_poll_per_second,
+    session_poll_burst=settings.rate_limit_session_poll_burst,
+    audience_rate=settings.rate_limit_audience_per_second,
+    audience_burst=settings.rate_limit_audience_burst,
+    audience_client_rate=settings.rate_limit_audience_client_per_second,
+    audience_client_burst=settings.rate_limit_audience_client_burst,
+    trusted_proxies=settings.trusted_proxies,
+    is_audience_session=get_session_manager().is_audience_session,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "ETag",
+        "Idempotent-Replayed",
+        "Retry-After",
+        "X-Profile-Id",
+        "X-Trace-Id",
+        "Location",
+        "Preference-Applied",
+    ],
 )
 
+shard_map = ShardMap.from_settings(settings)
+shard_router = ShardRouter(shard_map) if shard_map else None
+if shard_router is not None:
+    # Outside CORS so proxied responses keep the owner's CORS headers as-is.
+    app.add_middleware(ShardRouterMiddleware, router=shard_router)
+
+traffic_recorder = (
+    TrafficRecorder(settings.traffic_capture_dir, settings.traffic_capture_max_body_bytes)
+    if settings.traffic_capture_dir
+    else None
+)
+if traffic_recorder is not None:
+    # Outside admission so rejected requests are recorded, inside compression
+    # so response bodies are read uncompressed.
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
+if settings.admin_token:
+    app.add_middleware(
+        ProfilingMiddleware,
+        admin_token=settings.admin_token,
+        output_dir=settings.profiling_dir,
+        interval=settings.profiling_sample_interval,
+    )
+
+if settings.tracing_sample_rate > 0:
+    install_tracing(engine)
+    app.add_middleware(
+        TracingMiddleware,
+        writer=RotatingTraceWriter(
+            settings.tracing_dir, settings.tracing_max_bytes, settings.tracing_backup_count
+        ),
+        sample_rate=settings.tracing_sample_rate,
+    )
+
 
 @app.on_event("startup")
 def on_startup() -> None:
     create_all_tables()
+    if settings.traffic_replay_capture:
+        seed_sessions(settings.traffic_replay_capture, get_session_manager())
+    if traffic_recorder is not None:
+        traffic_recorder.start(engine, get_session_manager())
+    get_maintenance_service().start()
+    get_job_queue().start()
+    get_quiz_pack_store().start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    get_quiz_pack_store().stop()
+    get_job_queue().stop()
+    get_maintenance_service().stop()
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+    if shard_router is not None:
+        await shard_router.aclose()
 
 
 app.include_router(system.router)
@@ -29,3 +136,6 @@ app.include_router(profiles.router)
 app.include_router(quizzes.router)
 app.include_router(questions.router)
 app.include_router(sessions.router)
+app.include_router(batch.router)
+app.include_router(media.router)
+app.include_router(jobs.router)
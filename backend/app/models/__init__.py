@@ -1,9 +1,20 @@
+from app.models.attachment import QuestionAttachment
+from app.models.change_log import ChangeLogCounter, ChangeLogEntry
+from app.models.job import Job
 from app.models.profile import Profile
 from app.models.question import Question
 from app.models.quiz import Quiz
+from app.models.sampling import QuestionDraw, QuestionSampleKey, SampleIndexBuild
 
 __all__ = [
     "Profile",
     "Quiz",
     "Question",
+    "QuestionAttachment",
+    "ChangeLogEntry",
+    "ChangeLogCounter",
+    "QuestionSampleKey",
+    "SampleIndexBuild",
+    "QuestionDraw",
+    "Job",
 ]
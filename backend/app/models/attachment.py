@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import relationship
+
+from app.db.session import Base
+
+
+class QuestionAttachment(Base):
+    __tablename__ = "question_attachments"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    question_id = Column(
+        String(36),
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    content_hash = Column(String(64), nullable=False, index=True)
+    content_type = Column(String(100), nullable=False)
+    filename = Column(String(255), nullable=True)
+    size = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    question = relationship("Question", back_populates="attachments")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, func
+
+from app.db.session import Base
+
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_profile_seq", "profile_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    profile_id = Column(
+        String(36),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(String(36), nullable=False)
+    op = Column(String(10), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ChangeLogCounter(Base):
+    """How many changes a profile has logged; updated with every change-log insert.
+
+    The row is upserted before the entries are inserted, so it locks the
+    profile's log for the rest of the transaction and concurrent writers to
+    one profile take their ``seq`` values in commit order.
+    """
+
+    __tablename__ = "change_log_counters"
+
+    profile_id = Column(
+        String(36),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    changes = Column(Integer, nullable=False, default=0)
@@ -10,6 +10,8 @@ from app.db.session import Base
 
 class Question(Base):
     __tablename__ = "questions"
+    # Fetch server-side updated_at via RETURNING instead of expiring it on flush
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     quiz_id = Column(
@@ -29,3 +31,9 @@ class Question(Base):
     )
 
     quiz = relationship("Quiz", back_populates="questions")
+    attachments = relationship(
+        "QuestionAttachment",
+        back_populates="question",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
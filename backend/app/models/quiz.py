@@ -10,6 +10,8 @@ from app.db.session import Base
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    # Fetch server-side updated_at via RETURNING instead of expiring it on flush
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     profile_id = Column(
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, func
+
+from app.db.session import Base
+
+
+class QuestionSampleKey(Base):
+    """One row per bank question with a random sort key, for indexed random picks."""
+
+    __tablename__ = "question_sample_index"
+    __table_args__ = (
+        Index("ix_question_sample_tier", "profile_id", "points", "sample_key"),
+        Index("ix_question_sample_stratum", "profile_id", "points", "difficulty", "sample_key"),
+    )
+
+    question_id = Column(
+        String(36),
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    profile_id = Column(
+        String(36),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    points = Column(Integer, nullable=False)
+    # Empty string for questions without a difficulty, so it can sit in the index
+    difficulty = Column(String(50), nullable=False)
+    sample_key = Column(Float, nullable=False)
+
+
+class SampleIndexBuild(Base):
+    """The change-log position each profile's sample index is up to date with."""
+
+    __tablename__ = "question_sample_builds"
+
+    profile_id = Column(
+        String(36),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    built_seq = Column(Integer, nullable=False)
+
+
+class QuestionDraw(Base):
+    """Links a question copied into an assembled quiz to the bank question it came from."""
+
+    __tablename__ = "question_draws"
+    __table_args__ = (Index("ix_question_draws_source_drawn", "source_id", "drawn_at"),)
+
+    copy_id = Column(
+        String(36),
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    source_id = Column(
+        String(36),
+        ForeignKey("questions.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    profile_id = Column(
+        String(36),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    drawn_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, computed_field
+
+
+class AttachmentRead(BaseModel):
+    id: str
+    question_id: str
+    content_hash: str
+    content_type: str
+    filename: Optional[str] = None
+    size: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def url(self) -> str:
+        return f"/api/v1/media/{self.content_hash}"
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from .question import QuestionCreate, QuestionRead, QuestionUpdate
+from .quiz import QuizRead, QuizUpdate
+
+
+class UpdateQuizOperation(BaseModel):
+    op: Literal["update_quiz"]
+    quiz_id: str
+    data: QuizUpdate
+
+
+class CreateQuestionOperation(BaseModel):
+    op: Literal["create_question"]
+    quiz_id: str
+    data: QuestionCreate
+
+
+class UpdateQuestionOperation(BaseModel):
+    op: Literal["update_question"]
+    question_id: str
+    data: QuestionUpdate
+
+
+class DeleteQuestionOperation(BaseModel):
+    op: Literal["delete_question"]
+    question_id: str
+
+
+BatchOperation = Annotated[
+    Union[
+        UpdateQuizOperation,
+        CreateQuestionOperation,
+        UpdateQuestionOperation,
+        DeleteQuestionOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=200)
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    status: int
+    body: Optional[Union[QuizRead, QuestionRead]] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchOperationResult]
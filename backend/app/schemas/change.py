@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Literal
+
+from pydantic import BaseModel, ConfigDict
+
+from .question import QuestionRead
+from .quiz import QuizBase
+
+
+class QuizChange(QuizBase):
+    id: str
+    profile_id: str
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DeletedEntity(BaseModel):
+    entity_type: Literal["quiz", "question"]
+    entity_id: str
+
+
+class ChangeFeed(BaseModel):
+    since: int
+    next_since: int
+    has_more: bool
+    quizzes: List[QuizChange]
+    questions: List[QuestionRead]
+    deleted: List[DeletedEntity]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: str
+    profile_id: Optional[str] = None
+    progress_done: int
+    progress_total: Optional[int] = None
+    cancel_requested: bool
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
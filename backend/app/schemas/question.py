@@ -54,6 +54,16 @@ class QuestionOrderUpdate(BaseModel):
     difficulty: Optional[DifficultyLevel] = None
 
 
+class QuestionPlacement(BaseModel):
+    id: str
+    points: int = Field(..., gt=0)
+    difficulty: Optional[DifficultyLevel] = None
+
+
+class BoardLayoutUpdate(BaseModel):
+    questions: List[QuestionPlacement] = Field(..., min_length=1)
+
+
 class QuestionRead(QuestionBase):
     id: str
     quiz_id: str
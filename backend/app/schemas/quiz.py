@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from .question import QuestionRead
+from .question import DifficultyLevel, QuestionRead
 
 if TYPE_CHECKING:
     from app.schemas.question import QuestionRead
@@ -35,6 +35,19 @@ class QuizRead(QuizBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AssemblyStratum(BaseModel):
+    points: int = Field(..., gt=0)
+    # None draws from every difficulty within the points tier
+    difficulty: Optional[DifficultyLevel] = None
+    count: int = Field(..., gt=0, le=25)
+
+
+class QuizAssembly(QuizBase):
+    strata: List[AssemblyStratum] = Field(..., min_length=1, max_length=16)
+    # Skip bank questions drawn into another assembled quiz within this many days
+    exclude_recent_days: float = Field(default=7.0, ge=0)
+
+
 class QuizSummary(BaseModel):
     id: str
     title: str
@@ -0,0 +1,50 @@
+"""Serialisers for the hot read endpoints.
+
+Row mappings from Core selects are dumped straight to JSON through these
+precompiled ``TypeAdapter``s, skipping both ORM object construction and
+Pydantic model validation. The shapes mirror ``ProfileRead``, ``QuestionRead``
+and ``QuizRead`` field for field, so clients see the same JSON either way.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+
+class ProfileRow(TypedDict):
+    name: str
+    id: str
+    created_at: datetime
+
+
+class QuestionRow(TypedDict):
+    prompt: str
+    options: List[str]
+    correct_index: int
+    points: int
+    # Stored as the enum's string value; no need to round-trip it through DifficultyLevel
+    difficulty: Optional[str]
+    id: str
+    quiz_id: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class QuizRow(TypedDict):
+    title: str
+    description: Optional[str]
+    id: str
+    profile_id: str
+    created_at: datetime
+    updated_at: datetime
+    questions: List[QuestionRow]
+
+
+PROFILE_LIST_ADAPTER = TypeAdapter(List[ProfileRow])
+QUESTION_ADAPTER = TypeAdapter(QuestionRow)
+QUESTION_LIST_ADAPTER = TypeAdapter(List[QuestionRow])
+QUIZ_ADAPTER = TypeAdapter(QuizRow)
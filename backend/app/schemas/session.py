@@ -19,6 +19,15 @@ class SessionCreate(BaseModel):
     quiz_id: str
     teams: List[TeamBase] = Field(..., min_items=2, max_items=4)
     timer_seconds: Optional[int] = 20
+    audience_mode: bool = False
+
+
+class VoteTallyRead(BaseModel):
+    question_id: str
+    counts: List[int]
+    total: int
+    version: int
+    closed: bool
 
 
 class SessionRead(BaseModel):
@@ -30,6 +39,8 @@ class SessionRead(BaseModel):
     question_started_at: Optional[datetime] = None
     current_turn_index: int
     timer_seconds: int
+    audience_mode: bool = False
+    audience_tally: Optional[VoteTallyRead] = None
 
 
 class QuestionStartResponse(BaseModel):
@@ -43,5 +54,17 @@ class StealAttempt(BaseModel):
 
 class QuestionResolution(BaseModel):
     team_id: str
-    outcome: Literal["correct", "incorrect"]
+    # Optional in audience mode, where the closed vote tally decides it
+    outcome: Optional[Literal["correct", "incorrect"]] = None
     steal_attempt: Optional[StealAttempt] = None
+
+
+class VoteCast(BaseModel):
+    question_id: str
+    device_id: str = Field(..., min_length=1, max_length=128)
+    answer_index: int = Field(..., ge=0)
+
+
+class VoteReceipt(BaseModel):
+    question_id: str
+    accepted: bool
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Set
+
+
+class VotingClosed(ValueError):
+    """Raised when a vote arrives after the question's window has closed."""
+
+
+@dataclass(frozen=True)
+class VoteTally:
+    question_id: str
+    counts: List[int]
+    version: int
+    closed: bool
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def leading_index(self) -> Optional[int]:
+        """Return the answer with the most votes, or None when nobody voted or there is a tie."""
+        if not self.counts:
+            return None
+        best = max(self.counts)
+        if best == 0 or self.counts.count(best) > 1:
+            return None
+        return self.counts.index(best)
+
+
+class _VoteShard:
+    __slots__ = ("lock", "counts", "voters", "version")
+
+    def __init__(self, option_count: int) -> None:
+        self.lock = Lock()
+        self.counts = [0] * option_count
+        self.voters: Set[str] = set()
+        self.version = 0
+
+
+class VoteCounter:
+    """Audience votes for one question, split across independently locked shards.
+
+    A device always hashes to the same shard, so the one-vote-per-device check
+    and the increment happen under that shard's lock only; concurrent voters on
+    other shards never wait on each other. Live snapshots sum the shards without
+    locking and may be a vote or two behind; ``close`` waits for in-flight votes
+    and returns the exact final tally.
+    """
+
+    def __init__(self, question_id: str, option_count: int, shard_count: int = 16) -> None:
+        if option_count < 1:
+            raise ValueError("A question needs at least one option to vote on")
+        self.question_id = question_id
+        self.option_count = option_count
+        self._shards = [_VoteShard(option_count) for _ in range(max(1, shard_count))]
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def cast(self, device_id: str, answer_index: int) -> bool:
+        """Record a vote; returns False if this device has already voted."""
+        if not 0 <= answer_index < self.option_count:
+            raise ValueError(f"answer_index must be between 0 and {self.option_count - 1}")
+        shard = self._shards[zlib.crc32(device_id.encode("utf-8")) % len(self._shards)]
+        with shard.lock:
+            if self._closed:
+                raise VotingClosed("Voting is closed for this question")
+            if device_id in shard.voters:
+                return False
+            shard.voters.add(device_id)
+            shard.counts[answer_index] += 1
+            shard.version += 1
+        return True
+
+    def snapshot(self) -> VoteTally:
+        counts = [0] * self.option_count
+        version = 0
+        for shard in self._shards:
+            for index, count in enumerate(shard.counts):
+                counts[index] += count
+            version += shard.version
+        return VoteTally(self.question_id, counts, version, self._closed)
+
+    def close(self) -> VoteTally:
+        self._closed = True
+        for shard in self._shards:
+            # Acquiring each lock once lets any vote that passed the closed check finish.
+            with shard.lock:
+                pass
+        return self.snapshot()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Union
+
+from sqlalchemy import ColumnElement, Select, bindparam, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.models import ChangeLogCounter, ChangeLogEntry, Quiz
+from app.services import quiz_pack
+
+UPSERT = "upsert"
+DELETE = "delete"
+QUIZ = "quiz"
+QUESTION = "question"
+
+
+def record_quiz_change(db: Session, profile_id: str, quiz_id: str, op: str) -> None:
+    """Append a quiz change to the profile's log inside the caller's transaction."""
+    _count_changes(db, profile_id, 1)
+    db.execute(
+        insert(ChangeLogEntry).values(
+            profile_id=profile_id, entity_type=QUIZ, entity_id=quiz_id, op=op
+        )
+    )
+    quiz_pack.mark_changed(db, [quiz_id])
+
+
+def record_question_changes(db: Session, quiz_id: str, question_ids: Iterable[str], op: str) -> None:
+    """Append question changes in one executemany, resolving the profile in SQL."""
+    rows = [{"change_quiz_id": quiz_id, "change_entity_id": question_id} for question_id in question_ids]
+    if not rows:
+        return
+    quiz_pack.mark_changed(db, [quiz_id])
+    _count_changes(db, select(Quiz.profile_id).where(Quiz.id == quiz_id), len(rows))
+    profile_id = (
+        select(Quiz.profile_id)
+        .where(Quiz.id == bindparam("change_quiz_id"))
+        .scalar_subquery()
+    )
+    stmt = insert(ChangeLogEntry).values(
+        profile_id=profile_id,
+        entity_type=QUESTION,
+        entity_id=bindparam("change_entity_id"),
+        op=op,
+    )
+    db.execute(stmt, rows)
+
+
+def profile_version(profile_id: Any) -> ColumnElement[int]:
+    """The profile's count of logged changes, as an expression to select alongside other columns.
+
+    Every change recorded here bumps it in the writing transaction, so unlike
+    ``updated_at`` it tells apart two edits made within the same second.
+    """
+    changes = select(ChangeLogCounter.changes).where(ChangeLogCounter.profile_id == profile_id)
+    return func.coalesce(changes.scalar_subquery(), 0)
+
+
+def _count_changes(db: Session, profile_id: Union[str, Select], count: int) -> None:
+    # Bumping the counter row first holds the profile's row lock until commit,
+    # so a later writer allocates its seq values only after this one's are
+    # visible: readers paging by ``seq > since`` never skip an entry that
+    # commits late. SQLite serialises all writers anyway.
+    table = ChangeLogCounter.__table__
+    if isinstance(profile_id, str):
+        stmt = dialect_insert(db, table).values(profile_id=profile_id, changes=count)
+    else:
+        stmt = dialect_insert(db, table).from_select(
+            ["profile_id", "changes"], profile_id.add_columns(literal(count))
+        )
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=["profile_id"], set_={"changes": table.c.changes + count})
+    )
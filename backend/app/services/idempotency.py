@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+class IdempotencyKeyConflict(ValueError):
+    """Raised when a key is reused for a request with a different payload."""
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    done: Event = field(default_factory=Event)
+    result: Any = None
+    completed: bool = False
+
+
+class IdempotencyCache:
+    """Bounded, TTL'd store of responses keyed by ``Idempotency-Key``.
+
+    Concurrent requests with the same key wait for the first one to finish and
+    then replay its result. Failed requests are not cached so the client can
+    retry them.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        settings = get_settings()
+        self._max_entries = max_entries or settings.idempotency_cache_size
+        self._ttl_seconds = ttl_seconds or settings.idempotency_ttl_seconds
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = Lock()
+
+    def run(self, key: str, fingerprint: str, producer: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(result, replayed)`` for ``key``, calling ``producer`` at most once."""
+        while True:
+            with self._lock:
+                self._evict(time.monotonic())
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = _Entry(fingerprint=fingerprint, expires_at=time.monotonic() + self._ttl_seconds)
+                    self._entries[key] = entry
+                    owner = True
+                else:
+                    if entry.fingerprint != fingerprint:
+                        raise IdempotencyKeyConflict(
+                            "Idempotency-Key was already used for a different request"
+                        )
+                    if entry.completed:
+                        return entry.result, True
+                    owner = False
+
+            if owner:
+                return self._produce(key, entry, producer), False
+
+            entry.done.wait()
+            if entry.completed:
+                return entry.result, True
+            # The original attempt failed and was discarded; try again ourselves.
+
+    def _produce(self, key: str, entry: _Entry, producer: Callable[[], T]) -> T:
+        try:
+            result = producer()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.done.set()
+            raise
+        with self._lock:
+            entry.result = result
+            entry.completed = True
+        entry.done.set()
+        return result
+
+    def _evict(self, now: float) -> None:
+        # Entries share one TTL, so insertion order is also expiry order.
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if not entry.completed:
+                break
+            if entry.expires_at > now and len(self._entries) <= self._max_entries:
+                break
+            self._entries.popitem(last=False)
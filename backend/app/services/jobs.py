@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JobHandler = Callable[[Session, Dict[str, Any], "JobContext"], Optional[Dict[str, Any]]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the function that runs jobs of ``kind``.
+
+    The handler gets its own session and must commit its work; whatever it
+    returns is stored as the job result.
+    """
+
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation of its job has been requested."""
+
+
+class JobContext:
+    def __init__(self, session_factory: sessionmaker, job_id: str) -> None:
+        self._session_factory = session_factory
+        self.job_id = job_id
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        """Record progress and raise :class:`JobCancelled` if the job was cancelled meanwhile.
+
+        Call it between committed units of work: on SQLite the update would wait
+        on the handler's own open write transaction.
+        """
+        values: Dict[str, Any] = {"progress_done": done}
+        if total is not None:
+            values["progress_total"] = total
+        # A separate short transaction, so progress is visible while the handler's is open
+        with self._session_factory() as db:
+            cancel_requested = db.scalar(
+                update(Job).where(Job.id == self.job_id).values(**values).returning(Job.cancel_requested)
+            )
+            db.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+class JobQueue:
+    """Persistent job table worked by a pool of daemon threads.
+
+    Jobs are claimed with a guarded UPDATE, so several processes can share the
+    table. Enqueueing wakes an idle worker immediately; workers also poll so
+    they pick up jobs enqueued by other processes. Jobs left ``running`` by a
+    process on this host that has since died are marked failed on start.
+    """
+
+    def __init__(self, session_factory: sessionmaker, workers: int = 2, poll_interval: float = 1.0) -> None:
+        self._session_factory = session_factory
+        self._worker_count = workers
+        self._poll_interval = poll_interval
+        self._signal = threading.Semaphore(0)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._host = socket.gethostname()
+        self.worker_id = f"{self._host}:{os.getpid()}"
+
+    @property
+    def enabled(self) -> bool:
+        return self._worker_count > 0
+
+    def start(self) -> None:
+        if self._threads or self._worker_count <= 0:
+            return
+        self._stop.clear()
+        self._fail_orphaned_jobs()
+        for index in range(self._worker_count):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for _ in self._threads:
+            self._signal.release()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def enqueue(self, db: Session, kind: str, payload: Dict[str, Any], profile_id: Optional[str] = None) -> Job:
+        """Insert and commit a queued job in the caller's session."""
+        if kind not in _handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job = Job(kind=kind, status=QUEUED, payload=payload, profile_id=profile_id)
+        db.add(job)
+        db.commit()
+        self._signal.release()
+        return job
+
+    def cancel(self, db: Session, job_id: str) -> Optional[Job]:
+        """Cancel a queued job outright, or ask a running one to stop at its next progress report."""
+        job = db.scalar(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=CANCELLED, cancel_requested=True, finished_at=_now())
+            .returning(Job)
+        )
+        if job is None:
+            job = db.scalar(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING)
+                .values(cancel_requested=True)
+                .returning(Job)
+            )
+        if job is None:
+            job = db.get(Job, job_id)
+        db.commit()
+        return job
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                self._signal.acquire(timeout=self._poll_interval)
+                continue
+            self._execute(job_id)
+
+    def _claim(self) -> Optional[str]:
+        with self._session_factory() as db:
+            oldest = (
+                select(Job.id)
+                .where(Job.status == QUEUED)
+                .order_by(Job.created_at)
+                .limit(1)
+                .scalar_subquery()
+            )
+            job_id = db.scalar(
+                update(Job)
+                .where(Job.id == oldest, Job.status == QUEUED)
+                .values(status=RUNNING, started_at=_now(), claimed_by=self.worker_id)
+                .returning(Job.id)
+            )
+            db.commit()
+            return job_id
+
+    def _execute(self, job_id: str) -> None:
+        with self._session_factory() as db:
+            job = db.get(Job, job_id)
+            kind, payload = job.kind, dict(job.payload)
+            handler = _handlers.get(kind)
+            values: Dict[str, Any]
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler registered for job kind {kind!r}")
+                result = handler(db, payload, JobContext(self._session_factory, job_id))
+                values = {
+                    "status": SUCCEEDED,
+                    "result": result,
+                    "progress_done": func.coalesce(Job.progress_total, Job.progress_done),
+                }
+            except JobCancelled:
+                db.rollback()
+                values = {"status": CANCELLED}
+            except HTTPException as exc:
+                # Handlers reuse the endpoint helpers, which report problems this way
+                db.rollback()
+                values = {"status": FAILED, "error": str(exc.detail)}
+            except Exception as exc:  # noqa: BLE001 - a failing job must not kill the worker
+                db.rollback()
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                values = {"status": FAILED, "error": f"{type(exc).__name__}: {exc}"}
+            db.execute(update(Job).where(Job.id == job_id).values(finished_at=_now(), **values))
+            db.commit()
+
+    def _fail_orphaned_jobs(self) -> None:
+        with self._session_factory() as db:
+            running = db.execute(
+                select(Job.id, Job.claimed_by).where(
+                    Job.status == RUNNING, Job.claimed_by.like(f"{self._host}:%")
+                )
+            ).all()
+            orphaned = [job_id for job_id, claimed_by in running if not _pid_alive(claimed_by)]
+            if orphaned:
+                db.execute(
+                    update(Job)
+                    .where(Job.id.in_(orphaned))
+                    .values(status=FAILED, error="Interrupted by a server restart", finished_at=_now())
+                )
+                db.commit()
+
+
+def _pid_alive(claimed_by: str) -> bool:
+    try:
+        pid = int(claimed_by.rsplit(":", 1)[1])
+        os.kill(pid, 0)
+    except (IndexError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return pid != os.getpid()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
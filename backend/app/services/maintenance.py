@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, exists, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import aliased
+
+from app.models import ChangeLogEntry, Profile, Question, QuestionAttachment, Quiz
+from app.services.media_store import MediaStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MaintenanceReport:
+    orphaned_quizzes_deleted: int
+    orphaned_questions_deleted: int
+    orphaned_media_deleted: int
+    changes_compacted: int
+    bytes_before: Optional[int]
+    bytes_after: Optional[int]
+    reclaimed_bytes: Optional[int]
+    duration_seconds: float
+    finished_at: datetime
+
+
+class MaintenanceService:
+    """Garbage-collect orphaned rows, then VACUUM and ANALYZE the database.
+
+    Orphans are left behind by deletes that ran before SQLite foreign keys were
+    enforced; media blobs no attachment references are removed as well. When ``interval_seconds`` is positive the service also runs on a
+    daemon thread; runs never overlap.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        interval_seconds: int = 0,
+        media_store: Optional[MediaStore] = None,
+    ) -> None:
+        self._engine = engine
+        self._media_store = media_store
+        self._interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_report: Optional[MaintenanceReport] = None
+
+    def start(self) -> None:
+        if self._interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self) -> MaintenanceReport:
+        with self._lock:
+            started = time.perf_counter()
+            is_sqlite = self._engine.dialect.name == "sqlite"
+
+            with self._engine.begin() as conn:
+                bytes_before = self._database_size(conn, is_sqlite)
+                quizzes_deleted = conn.execute(
+                    delete(Quiz).where(Quiz.profile_id.not_in(select(Profile.id)))
+                ).rowcount
+                questions_deleted = conn.execute(
+                    delete(Question).where(Question.quiz_id.not_in(select(Quiz.id)))
+                ).rowcount
+                conn.execute(
+                    delete(QuestionAttachment).where(
+                        QuestionAttachment.question_id.not_in(select(Question.id))
+                    )
+                )
+                # Only the newest entry per entity matters to a change-feed reader
+                newer = aliased(ChangeLogEntry)
+                changes_compacted = conn.execute(
+                    delete(ChangeLogEntry).where(
+                        exists().where(
+                            newer.entity_type == ChangeLogEntry.entity_type,
+                            newer.entity_id == ChangeLogEntry.entity_id,
+                            newer.seq > ChangeLogEntry.seq,
+                        )
+                    )
+                ).rowcount
+                referenced = set(conn.scalars(select(QuestionAttachment.content_hash).distinct()))
+
+            media_deleted = 0
+            if self._media_store is not None:
+                media_deleted = self._media_store.delete_unreferenced(referenced)
+
+            # VACUUM cannot run inside a transaction block on either backend
+            with self._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("VACUUM"))
+                bytes_after = self._database_size(conn, is_sqlite)
+                conn.execute(text("ANALYZE"))
+
+            reclaimed = None
+            if bytes_before is not None and bytes_after is not None:
+                reclaimed = bytes_before - bytes_after
+            self.last_report = MaintenanceReport(
+                orphaned_quizzes_deleted=quizzes_deleted,
+                orphaned_questions_deleted=questions_deleted,
+                orphaned_media_deleted=media_deleted,
+                changes_compacted=changes_compacted,
+                bytes_before=bytes_before,
+                bytes_after=bytes_after,
+                reclaimed_bytes=reclaimed,
+                duration_seconds=round(time.perf_counter() - started, 3),
+                finished_at=datetime.now(timezone.utc),
+            )
+            return self.last_report
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                self.run()
+            except Exception:  # noqa: BLE001 - keep the thread alive across transient DB errors
+                logger.exception("Database maintenance failed")
+
+    @staticmethod
+    def _database_size(conn: Connection, is_sqlite: bool) -> Optional[int]:
+        if is_sqlite:
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            return int(page_count) * int(page_size)
+        if conn.dialect.name == "postgresql":
+            return int(conn.execute(text("SELECT pg_database_size(current_database())")).scalar())
+        return None
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Sequence
+
+try:  # Pillow is optional; without it images are stored but not downscaled
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on deployment
+    Image = None
+
+ALLOWED_CONTENT_TYPES = {
+    "image/png": "PNG",
+    "image/jpeg": "JPEG",
+    "image/webp": "WEBP",
+    "image/gif": None,
+    "audio/mpeg": None,
+    "audio/ogg": None,
+    "audio/wav": None,
+}
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredMedia:
+    content_hash: str
+    size: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+class MediaStore:
+    """Content-addressed blob store on local disk.
+
+    Blobs live at ``objects/<h[:2]>/<h>`` and downscaled image variants at
+    ``variants/<h>-<width>``. Identical uploads share one file, and since a
+    path never changes content it can be cached forever.
+    """
+
+    def __init__(self, root: Path, variant_widths: Sequence[int] = ()) -> None:
+        self.root = root
+        self.variant_widths = sorted(variant_widths)
+
+    def path_for(self, content_hash: str) -> Path:
+        return self.root / "objects" / content_hash[:2] / content_hash
+
+    def variant_path(self, content_hash: str, width: int) -> Path:
+        return self.root / "variants" / f"{content_hash}-{width}"
+
+    def save(self, stream: BinaryIO, content_type: str, max_bytes: int) -> StoredMedia:
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise ValueError(f"Unsupported media type: {content_type}")
+
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := stream.read(_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"File exceeds the {max_bytes} byte limit")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            content_hash = digest.hexdigest()
+            final_path = self.path_for(content_hash)
+            final_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, final_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        stored = StoredMedia(content_hash=content_hash, size=size)
+        image_format = ALLOWED_CONTENT_TYPES[content_type]
+        if image_format and Image is not None:
+            self._build_variants(stored, image_format)
+        return stored
+
+    def resolve(self, content_hash: str, width: Optional[int] = None) -> Optional[Path]:
+        """Return the best file for ``width``: the smallest variant at least that wide, else the original."""
+        if width is not None:
+            for variant_width in self.variant_widths:
+                if variant_width >= width:
+                    variant = self.variant_path(content_hash, variant_width)
+                    if variant.is_file():
+                        return variant
+                    break
+        original = self.path_for(content_hash)
+        return original if original.is_file() else None
+
+    def iter_hashes(self) -> Iterator[str]:
+        objects = self.root / "objects"
+        if not objects.is_dir():
+            return
+        for path in objects.glob("*/*"):
+            yield path.name
+
+    def delete_unreferenced(self, referenced: set[str], min_age_seconds: float = 3600) -> int:
+        """Delete blobs and variants no attachment points at; skips files younger than ``min_age_seconds``."""
+        cutoff = time.time() - min_age_seconds
+        deleted = 0
+        for content_hash in list(self.iter_hashes()):
+            path = self.path_for(content_hash)
+            if content_hash in referenced or path.stat().st_mtime > cutoff:
+                continue
+            path.unlink(missing_ok=True)
+            for variant_width in self.variant_widths:
+                self.variant_path(content_hash, variant_width).unlink(missing_ok=True)
+            deleted += 1
+        return deleted
+
+    def _build_variants(self, stored: StoredMedia, image_format: str) -> None:
+        try:
+            with Image.open(self.path_for(stored.content_hash)) as image:
+                stored.width, stored.height = image.size
+                for width in self.variant_widths:
+                    target = self.variant_path(stored.content_hash, width)
+                    if width >= image.width or target.is_file():
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    variant = image.copy()
+                    variant.thumbnail((width, image.height * width // image.width + 1))
+                    variant.save(target, format=image_format)
+        except (OSError, Image.DecompressionBombError) as exc:
+            raise ValueError("Uploaded file is not a valid image") from exc
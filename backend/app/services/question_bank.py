@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, exists, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.models import ChangeLogEntry, Question, QuestionDraw, QuestionSampleKey, Quiz, SampleIndexBuild
+from app.services import change_feed
+
+# A window this many times larger than the request is read per stratum and
+# sampled from, so neighbouring sort keys do not always come out together.
+_OVERSAMPLE = 4
+# Beyond this many log entries since the last build, re-index the whole bank
+_INCREMENTAL_LIMIT = 2000
+
+
+@dataclass(frozen=True)
+class Stratum:
+    points: int
+    difficulty: Optional[str]
+    count: int
+
+    def label(self) -> str:
+        return f"{self.points} pts / {self.difficulty or 'any difficulty'}"
+
+
+def refresh_sample_index(db: Session, profile_id: str) -> None:
+    """Bring the profile's sample index up to date with its change log.
+
+    Questions upserted since the last build are re-keyed by primary key; after
+    a large import, or on first use, the whole bank is indexed in one
+    INSERT ... SELECT instead. Deleted questions and quizzes drop out through
+    ON DELETE CASCADE.
+    """
+    build = db.get(SampleIndexBuild, profile_id)
+    if build is not None:
+        entries = db.execute(
+            select(ChangeLogEntry.seq, ChangeLogEntry.entity_type, ChangeLogEntry.entity_id)
+            .where(ChangeLogEntry.profile_id == profile_id, ChangeLogEntry.seq > build.built_seq)
+            .order_by(ChangeLogEntry.seq)
+            .limit(_INCREMENTAL_LIMIT + 1)
+        ).all()
+        if not entries:
+            return
+        if len(entries) <= _INCREMENTAL_LIMIT:
+            changed = {entry.entity_id for entry in entries if entry.entity_type == change_feed.QUESTION}
+            if changed:
+                db.execute(delete(QuestionSampleKey).where(QuestionSampleKey.question_id.in_(changed)))
+                # Changed ids come from this profile's log, so look them up by primary key alone
+                _index_bank(db, Question.id.in_(changed))
+            build.built_seq = entries[-1].seq
+            db.flush()
+            return
+
+    latest_seq = db.scalar(
+        select(func.coalesce(func.max(ChangeLogEntry.seq), 0)).where(ChangeLogEntry.profile_id == profile_id)
+    )
+    db.execute(delete(QuestionSampleKey).where(QuestionSampleKey.profile_id == profile_id))
+    _index_bank(db, Quiz.profile_id == profile_id)
+    # Two first-time assemblies for one profile can both get here; the later
+    # one re-indexes on top instead of failing on the primary keys.
+    stmt = dialect_insert(db, SampleIndexBuild.__table__).values(profile_id=profile_id, built_seq=latest_seq)
+    db.execute(stmt.on_conflict_do_update(index_elements=["profile_id"], set_={"built_seq": latest_seq}))
+    if build is not None:
+        db.expire(build)
+
+
+def draw_questions(
+    db: Session,
+    profile_id: str,
+    strata: Sequence[Stratum],
+    exclude_since: Optional[datetime],
+) -> Tuple[List[str], List[Stratum]]:
+    """Pick question ids for every stratum from random points in the sample index.
+
+    Each stratum is read as one or two index range scans starting at a random
+    key (wrapping around to the start of the range), all in a single UNION ALL
+    statement. Returns the chosen ids and the strata that could not be filled.
+    """
+    low, high = _key_range(db)
+    selects = []
+    for position, stratum in enumerate(strata):
+        start = random.uniform(low, high)
+        window = stratum.count * _OVERSAMPLE
+        conditions = [QuestionSampleKey.profile_id == profile_id, QuestionSampleKey.points == stratum.points]
+        if stratum.difficulty is not None:
+            conditions.append(QuestionSampleKey.difficulty == stratum.difficulty)
+        if exclude_since is not None:
+            conditions.append(
+                ~exists().where(
+                    QuestionDraw.source_id == QuestionSampleKey.question_id,
+                    QuestionDraw.drawn_at >= exclude_since,
+                )
+            )
+        for wrapped, key_condition in enumerate(
+            (QuestionSampleKey.sample_key >= start, QuestionSampleKey.sample_key < start)
+        ):
+            ranged = (
+                select(QuestionSampleKey.question_id)
+                .where(*conditions, key_condition)
+                .order_by(QuestionSampleKey.sample_key)
+                .limit(window)
+                .subquery()
+            )
+            selects.append(
+                select(
+                    ranged.c.question_id,
+                    literal(position).label("stratum"),
+                    literal(wrapped).label("wrapped"),
+                )
+            )
+
+    rows: Dict[int, List[Tuple[int, str]]] = {position: [] for position in range(len(strata))}
+    for question_id, position, wrapped in db.execute(union_all(*selects)):
+        rows[position].append((wrapped, question_id))
+    # Keys from the random start onwards first, then the wrapped-around ones
+    candidates = {
+        position: [question_id for _, question_id in sorted(found, key=lambda row: row[0])]
+        for position, found in rows.items()
+    }
+
+    chosen: List[str] = []
+    taken = set()
+    shortfalls: List[Stratum] = []
+    for position, stratum in enumerate(strata):
+        # A question can match several "any difficulty" or overlapping strata; use it once
+        pool = [question_id for question_id in candidates[position] if question_id not in taken]
+        pool = pool[: stratum.count * _OVERSAMPLE]
+        if len(pool) < stratum.count:
+            shortfalls.append(stratum)
+            continue
+        picked = random.sample(pool, stratum.count)
+        taken.update(picked)
+        chosen.extend(picked)
+    return chosen, shortfalls
+
+
+def _index_bank(db: Session, *conditions: Any) -> None:
+    bank = (
+        select(
+            Question.id,
+            Quiz.profile_id,
+            Question.points,
+            func.coalesce(Question.difficulty, ""),
+            func.random(),
+        )
+        .join(Quiz, Quiz.id == Question.quiz_id)
+        .where(~exists().where(QuestionDraw.copy_id == Question.id), *conditions)
+    )
+    stmt = dialect_insert(db, QuestionSampleKey.__table__).from_select(
+        ["question_id", "profile_id", "points", "difficulty", "sample_key"], bank
+    )
+    # A concurrent refresh may have keyed the same questions already
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["question_id"]))
+
+
+def recent_cutoff(days: float) -> Optional[datetime]:
+    if days <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _key_range(db: Session) -> Tuple[float, float]:
+    # SQLite's random() spans the signed 64-bit integers, PostgreSQL's is [0, 1)
+    if db.get_bind().dialect.name == "sqlite":
+        return -(2.0**63), 2.0**63
+    return 0.0, 1.0
@@ -0,0 +1,396 @@
+"""Precompiled quiz packs: one file per quiz holding everything a game needs.
+
+A pack is a versioned binary file laid out as::
+
+    header | question table | tier table | quiz document
+
+The header carries the quiz and profile ids, the quiz ETag and the version of
+the profile the pack was built at: its count of change-log entries. The question table gives, per question in
+board order, its id, points, option count, correct index and the byte range
+of its object inside the document. Each tier row gives a points value and the
+run of questions worth that much. The document is byte-for-byte the JSON that
+``GET /quizzes/{id}`` returns.
+
+Packs are memory-mapped and shared by every worker process through the file
+system. Committing a quiz change deletes the quiz's pack before the request
+returns, and a background thread builds the new one, or a deleted-flag
+tombstone if the quiz is gone. Readers that find no pack build it themselves.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.http_cache import make_etag
+from app.models import ChangeLogCounter, Question, Quiz
+from app.schemas.read_rows import QUESTION_ADAPTER, QUIZ_ADAPTER, QuestionRow, QuizRow
+
+logger = logging.getLogger(__name__)
+
+PACK_MAGIC = b"PCPK"
+PACK_VERSION = 2
+PACK_MEDIA_TYPE = "application/vnd.peace-cake.quiz-pack"
+# Flag on a header-only pack left where a deleted quiz's pack was
+FLAG_DELETED = 1
+
+# magic, version, flags, built_version, quiz_id, profile_id, etag,
+# question_count, tier_count, document_offset, document_length
+_HEADER = struct.Struct("<4sHHQ36s36s34sIIII")
+# id, points, option_count, correct_index, offset and length in the document
+_QUESTION = struct.Struct("<36sIHhII")
+# points, first question, question count
+_TIER = struct.Struct("<III")
+
+_CHANGED_KEY = "quiz_pack_changed"
+_QUIZ_COLUMNS = [name for name in QuizRow.__annotations__ if name != "questions"]
+_QUESTION_COLUMNS = list(QuestionRow.__annotations__)
+
+
+@dataclass(frozen=True)
+class PackedQuestion:
+    points: int
+    option_count: int
+    correct_index: int
+
+
+class QuizPack:
+    """Read-only view over a pack held in a memory map or a bytes object."""
+
+    def __init__(self, buffer: Any) -> None:
+        self._buffer = buffer
+        (
+            magic,
+            version,
+            self.flags,
+            self.built_version,
+            quiz_id,
+            profile_id,
+            etag,
+            self.question_count,
+            self.tier_count,
+            self._document_offset,
+            self._document_length,
+        ) = _HEADER.unpack_from(buffer, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("Not a version %d quiz pack" % PACK_VERSION)
+        self.quiz_id = quiz_id.decode("ascii")
+        self.profile_id = profile_id.decode("ascii")
+        self.etag = etag.decode("ascii")
+        self._questions: Optional[Dict[str, PackedQuestion]] = None
+
+    @property
+    def deleted(self) -> bool:
+        return bool(self.flags & FLAG_DELETED)
+
+    def __len__(self) -> int:
+        return self._document_offset + self._document_length
+
+    def document(self) -> memoryview:
+        """The quiz JSON, without copying it out of the map."""
+        return memoryview(self._buffer)[self._document_offset : len(self)]
+
+    def question(self, question_id: str) -> Optional[PackedQuestion]:
+        if self._questions is None:
+            questions = {}
+            for index in range(self.question_count):
+                packed_id, points, option_count, correct_index, _, _ = _QUESTION.unpack_from(
+                    self._buffer, _HEADER.size + index * _QUESTION.size
+                )
+                questions[packed_id.decode("ascii")] = PackedQuestion(points, option_count, correct_index)
+            self._questions = questions
+        return self._questions.get(question_id)
+
+    def tiers(self) -> List[Tuple[int, int, int]]:
+        """Board rows as ``(points, first question index, question count)``."""
+        start = _HEADER.size + self.question_count * _QUESTION.size
+        return [_TIER.unpack_from(self._buffer, start + index * _TIER.size) for index in range(self.tier_count)]
+
+    def chunks(self, size: int = 64 * 1024) -> Iterator[bytes]:
+        view = memoryview(self._buffer)
+        for start in range(0, len(self), size):
+            yield bytes(view[start : min(start + size, len(self))])
+
+
+def compile_pack(quiz_row: Dict[str, Any], question_rows: List[Dict[str, Any]], built_version: int) -> bytes:
+    """Encode a quiz and its questions, already in board order, as a pack."""
+    # The quiz document is assembled from separately encoded questions so each
+    # question's byte range is known; ``questions`` is the last field of QuizRow.
+    head = QUIZ_ADAPTER.dump_json({**quiz_row, "questions": []})
+    if not head.endswith(b"[]}"):
+        raise ValueError("QuizRow must end with its questions")
+    document = bytearray(head[:-2])
+    question_table = bytearray()
+    tiers: List[List[int]] = []
+    for index, row in enumerate(question_rows):
+        if index:
+            document += b","
+        encoded = QUESTION_ADAPTER.dump_json(row)
+        question_table += _QUESTION.pack(
+            row["id"].encode("ascii"),
+            row["points"],
+            len(row["options"]),
+            row["correct_index"],
+            len(document),
+            len(encoded),
+        )
+        document += encoded
+        if tiers and tiers[-1][0] == row["points"]:
+            tiers[-1][2] += 1
+        else:
+            tiers.append([row["points"], index, 1])
+    document += b"]}"
+
+    # Versioned by content: updated_at has one-second resolution on SQLite, so
+    # two edits within a second would otherwise share an ETag.
+    etag = make_etag("quiz", quiz_row["id"], hashlib.sha256(document).hexdigest())
+    tier_table = b"".join(_TIER.pack(*tier) for tier in tiers)
+    document_offset = _HEADER.size + len(question_table) + len(tier_table)
+    header = _pack_header(
+        0, built_version, quiz_row["id"], quiz_row["profile_id"], etag, len(question_rows), len(tiers),
+        document_offset, len(document),
+    )
+    return header + bytes(question_table) + tier_table + bytes(document)
+
+
+class QuizPackStore:
+    """Packs on disk under ``directory``, memory-mapped on first use in each process.
+
+    Every lookup stats the pack file, so a pack replaced by another process is
+    picked up on the next request. At most ``max_maps`` packs stay mapped; an
+    evicted map is closed once the last request still reading it lets go.
+    Changed quizzes are tracked per session by :func:`mark_changed` and their
+    packs removed right after that session commits.
+    """
+
+    def __init__(self, session_factory: sessionmaker, directory: Path, max_maps: int = 256) -> None:
+        self._session_factory = session_factory
+        self.directory = directory
+        self.max_maps = max_maps
+        self._maps: OrderedDict[str, Tuple[Tuple[int, int], QuizPack]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        event.listen(session_factory, "after_commit", self._after_commit)
+        event.listen(session_factory, "after_rollback", _forget_changes)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="quiz-pack-builder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def load(self, db: Session, quiz_id: str) -> Optional[QuizPack]:
+        """Return the quiz's pack, building it from ``db`` if there is none; None if the quiz is gone."""
+        if not _is_quiz_id(quiz_id):
+            return None
+        path = self._path(quiz_id)
+        try:
+            pack = self._mapped(quiz_id, path)
+        except FileNotFoundError:
+            self._forget_map(quiz_id)
+            pack = self._build(db, quiz_id)
+        except ValueError:
+            logger.warning("Rebuilding unreadable quiz pack %s", path)
+            pack = self._build(db, quiz_id)
+        if pack is None or pack.deleted:
+            return None
+        return pack
+
+    def invalidate(self, quiz_ids: Iterable[str]) -> None:
+        quiz_ids = set(quiz_ids)
+        with self._file_lock():
+            for quiz_id in quiz_ids:
+                self._path(quiz_id).unlink(missing_ok=True)
+        with self._lock:
+            for quiz_id in quiz_ids:
+                self._maps.pop(quiz_id, None)
+            self._dirty |= quiz_ids
+        self._wake.set()
+
+    def _mapped(self, quiz_id: str, path: Path) -> QuizPack:
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._maps.get(quiz_id)
+            if cached is not None and cached[0] == identity:
+                self._maps.move_to_end(quiz_id)
+                return cached[1]
+        with open(path, "rb") as handle:
+            # The map stays valid after the file is replaced or unlinked
+            pack = QuizPack(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+        with self._lock:
+            # Dropping a map rather than closing it: responses may still hold
+            # views into it, and it is closed when the last of them goes.
+            self._maps[quiz_id] = (identity, pack)
+            self._maps.move_to_end(quiz_id)
+            while len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        return pack
+
+    def _forget_map(self, quiz_id: str) -> None:
+        with self._lock:
+            self._maps.pop(quiz_id, None)
+
+    def _build(self, db: Session, quiz_id: str, tombstone: bool = False) -> Optional[QuizPack]:
+        """Compile and persist the quiz's pack; None if there is no such quiz.
+
+        Only the background rebuild passes ``tombstone``: its ids were changed
+        by a commit, so a missing row there means the quiz was deleted. Readers
+        asking for an unknown id leave nothing behind.
+        """
+        # Read the profile's version before the rows: a change committed in
+        # between then makes the pack look older than it is, never newer. Every
+        # change to the quiz bumps it in the same transaction (see change_feed).
+        profile_id = select(Quiz.profile_id).where(Quiz.id == quiz_id).scalar_subquery()
+        changes = select(ChangeLogCounter.changes).where(ChangeLogCounter.profile_id == profile_id)
+        built_version = db.scalar(select(func.coalesce(changes.scalar_subquery(), 0)))
+        quiz_table = Quiz.__table__.c
+        quiz_row = (
+            db.execute(select(*(quiz_table[name] for name in _QUIZ_COLUMNS)).where(quiz_table.id == quiz_id))
+            .mappings()
+            .first()
+        )
+        if quiz_row is None:
+            if tombstone:
+                self._persist(quiz_id, _pack_header(FLAG_DELETED, built_version, quiz_id, "", "", 0, 0, _HEADER.size, 0))
+            return None
+        question_table = Question.__table__.c
+        question_rows = db.execute(
+            select(*(question_table[name] for name in _QUESTION_COLUMNS))
+            .where(question_table.quiz_id == quiz_id)
+            .order_by(question_table.points)
+        ).mappings()
+        data = compile_pack(dict(quiz_row), [dict(row) for row in question_rows], built_version)
+        self._persist(quiz_id, data)
+        return QuizPack(data)
+
+    def _persist(self, quiz_id: str, data: bytes) -> None:
+        """Write the pack unless a pack built at the same or a later change is already there.
+
+        Deletion is final, so a tombstone replaces any live pack and is never
+        replaced by one. Versions cannot order them: deleting a profile drops
+        its change count, and a quiz moved to another profile counts afresh.
+        """
+        path = self._path(quiz_id)
+        _, _, flags, built_version = _HEADER.unpack_from(data, 0)[:4]
+        deleted = bool(flags & FLAG_DELETED)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self._file_lock():
+                try:
+                    with open(path, "rb") as handle:
+                        existing = _HEADER.unpack(handle.read(_HEADER.size))
+                    if existing[0] == PACK_MAGIC and existing[1] == PACK_VERSION:
+                        if existing[2] & FLAG_DELETED or (not deleted and existing[3] >= built_version):
+                            return
+                except (FileNotFoundError, struct.error):
+                    pass
+                temporary = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                temporary.write_bytes(data)
+                os.replace(temporary, path)
+        except OSError:
+            # A read-only disk costs a rebuild per load, not a failed request
+            logger.warning("Could not write quiz pack %s", path, exc_info=True)
+
+    def _after_commit(self, session: Session) -> None:
+        changed = session.info.pop(_CHANGED_KEY, None)
+        if changed:
+            self.invalidate(changed)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+            for quiz_id in dirty:
+                if self._stop.is_set():
+                    return
+                try:
+                    with self._session_factory() as db:
+                        self._build(db, quiz_id, tombstone=True)
+                except Exception:  # noqa: BLE001 - the next load rebuilds it anyway
+                    logger.exception("Building the pack for quiz %s failed", quiz_id)
+
+    def _path(self, quiz_id: str) -> Path:
+        return self.directory / f"{quiz_id}.pack"
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # Serialises pack replacement against invalidation across processes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.directory / "packs.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def mark_changed(db: Session, quiz_ids: Iterable[str]) -> None:
+    """Have the packs of ``quiz_ids`` rebuilt once the session's transaction commits."""
+    db.info.setdefault(_CHANGED_KEY, set()).update(quiz_ids)
+
+
+def _forget_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def _is_quiz_id(quiz_id: str) -> bool:
+    # Quiz ids are canonical UUID strings; anything else, such as a non-ASCII
+    # path parameter, cannot name a pack file.
+    try:
+        return str(uuid.UUID(quiz_id)) == quiz_id
+    except ValueError:
+        return False
+
+
+def _pack_header(
+    flags: int,
+    built_version: int,
+    quiz_id: str,
+    profile_id: str,
+    etag: str,
+    question_count: int,
+    tier_count: int,
+    document_offset: int,
+    document_length: int,
+) -> bytes:
+    return _HEADER.pack(
+        PACK_MAGIC,
+        PACK_VERSION,
+        flags,
+        built_version,
+        quiz_id.encode("ascii"),
+        profile_id.encode("ascii"),
+        etag.encode("ascii"),
+        question_count,
+        tier_count,
+        document_offset,
+        document_length,
+    )
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import uuid
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
 from threading import Lock
 from typing import Dict, List, Optional
 
 from app.core.config import get_settings
+from app.core.tracing import traced_lock
+from app.services.audience import VoteCounter, VoteTally, VotingClosed
+from app.services.sharding import ShardMap
 
 
 @dataclass
@@ -28,6 +31,9 @@ class SessionState:
     question_started_at: Optional[datetime] = None
     current_turn_index: int = 0
     timer_seconds: int = 20
+    audience_mode: bool = False
+    votes: Optional[VoteCounter] = None
+    last_tally: Optional[VoteTally] = None
 
 
 class SessionManager:
@@ -35,15 +41,22 @@ class SessionManager:
         self._sessions: Dict[str, SessionState] = {}
         self._lock = Lock()
         self._settings = get_settings()
+        self._shards = ShardMap.from_settings(self._settings)
 
-    def create_session(self, quiz_id: str, team_names: List[str], timer_seconds: int = 20) -> SessionState:
+    def create_session(
+        self,
+        quiz_id: str,
+        team_names: List[str],
+        timer_seconds: int = 20,
+        audience_mode: bool = False,
+    ) -> SessionState:
         if not (self._settings.min_teams <= len(team_names) <= self._settings.max_teams):
             raise ValueError(
                 f"Team count must be between {self._settings.min_teams} and {self._settings.max_teams}."
             )
 
-        with self._lock:
-            session_id = str(uuid.uuid4())
+        with traced_lock(self._lock, "session_manager.lock"):
+            session_id = self._shards.mint_session_id() if self._shards else str(uuid.uuid4())
             teams = [
                 TeamState(id=str(uuid.uuid4()), name=name.strip(), score=0)
                 for name in team_names
@@ -52,7 +65,8 @@ class SessionManager:
                 id=session_id, 
                 quiz_id=quiz_id, 
                 teams=teams, 
-                timer_seconds=timer_seconds
+                timer_seconds=timer_seconds,
+                audience_mode=audience_mode,
             )
             self._sessions[session_id] = state
             return state
@@ -60,38 +74,81 @@ class SessionManager:
     def get_session(self, session_id: str) -> Optional[SessionState]:
         return self._sessions.get(session_id)
 
-    def start_question(self, session_id: str, question_id: str) -> SessionState:
-        with self._lock:
+    def is_audience_session(self, session_id: str) -> bool:
+        state = self._sessions.get(session_id)
+        return state is not None and state.audience_mode
+
+    def start_question(self, session_id: str, question_id: str, option_count: int = 0) -> SessionState:
+        with traced_lock(self._lock, "session_manager.lock"):
             state = self._require_session(session_id)
             if question_id in state.used_question_ids:
                 raise ValueError("Question already used in this session")
+            # Questions without options are played normally, just without a vote
+            votes = None
+            if state.audience_mode and option_count > 0:
+                votes = VoteCounter(question_id, option_count, self._settings.audience_vote_shards)
             state.current_question_id = question_id
             state.question_started_at = datetime.now(timezone.utc)
+            state.votes = votes
             return state
 
+    def cast_vote(self, session_id: str, question_id: str, device_id: str, answer_index: int) -> bool:
+        """Count one audience vote; returns False for a repeat vote from the same device.
+
+        Deliberately does not take the manager lock: the counter's shard locks
+        are enough, so a burst of votes never queues behind host actions.
+        """
+        state = self._require_session(session_id)
+        counter = state.votes
+        if counter is None or counter.question_id != question_id:
+            raise VotingClosed("Question is not open for voting in this session")
+        started_at = state.question_started_at
+        if started_at and datetime.now(timezone.utc) > started_at + timedelta(seconds=state.timer_seconds):
+            raise VotingClosed("Voting window has closed for this question")
+        return counter.cast(device_id, answer_index)
+
+    def current_tally(self, session_id: str) -> Optional[VoteTally]:
+        state = self._require_session(session_id)
+        counter = state.votes
+        return counter.snapshot() if counter is not None else state.last_tally
+
     def resolve_question(
         self,
         session_id: str,
         question_id: str,
         team_id: str,
-        outcome: str,
+        outcome: Optional[str],
         *,
         points: int,
         steal_attempt: Optional[dict] = None,
+        correct_index: Optional[int] = None,
     ) -> SessionState:
-        with self._lock:
+        with traced_lock(self._lock, "session_manager.lock"):
             state = self._require_session(session_id)
             if state.current_question_id != question_id:
                 raise ValueError("Question is not currently active for this session")
 
             team = self._find_team(state, team_id)
-            if outcome == "correct":
-                team.score += points
-            elif outcome != "incorrect":
+            # Validate everything before touching the session: a rejected
+            # resolve must leave the question, its ballot and the scores open.
+            if outcome is None:
+                # Audience mode: the team answers with the room's plurality vote
+                tally = state.votes.snapshot() if state.votes is not None else state.last_tally
+                if not state.audience_mode or tally is None or tally.question_id != question_id:
+                    raise ValueError("outcome is required unless the audience voted on this question")
+                leading = tally.leading_index()
+                outcome = "correct" if leading is not None and leading == correct_index else "incorrect"
+            if outcome not in {"correct", "incorrect"}:
                 raise ValueError("Outcome must be 'correct' or 'incorrect'")
+            steal_team = self._validate_steal(state, steal_attempt, outcome) if steal_attempt else None
 
-            if steal_attempt:
-                state = self._handle_steal(state, steal_attempt, outcome, points)
+            if state.votes is not None:
+                state.last_tally = state.votes.close()
+                state.votes = None
+            if outcome == "correct":
+                team.score += points
+            if steal_team is not None and steal_attempt["outcome"] == "correct":
+                steal_team.score += int(points * self._settings.steal_points_factor)
 
             state.used_question_ids.add(question_id)
             state.current_question_id = None
@@ -102,27 +159,32 @@ class SessionManager:
             
             return state
 
-    def _handle_steal(
-        self,
-        state: SessionState,
-        steal_attempt: dict,
-        initial_outcome: str,
-        points: int,
-    ) -> SessionState:
+    def _validate_steal(self, state: SessionState, steal_attempt: dict, initial_outcome: str) -> TeamState:
         steal_team_id = steal_attempt.get("team_id")
         steal_outcome = steal_attempt.get("outcome")
         if steal_team_id is None or steal_outcome not in {"correct", "incorrect"}:
             raise ValueError("Invalid steal attempt payload")
         if initial_outcome != "incorrect":
             raise ValueError("Steal attempt only allowed after an incorrect initial outcome")
-        steal_team = self._find_team(state, steal_team_id)
-        if steal_outcome == "correct":
-            steal_points = int(points * self._settings.steal_points_factor)
-            steal_team.score += steal_points
-        return state
+        return self._find_team(state, steal_team_id)
+
+    def export_sessions(self) -> List[dict]:
+        """Plain-data copy of every live session, for traffic-capture snapshots.
+
+        Open vote counters are kept as their question and option count only;
+        votes cast before the snapshot are not carried over.
+        """
+        with traced_lock(self._lock, "session_manager.lock"):
+            return [_export_state(state) for state in self._sessions.values()]
+
+    def restore_sessions(self, snapshots: List[dict]) -> None:
+        """Replace the live sessions with ones from :meth:`export_sessions`."""
+        states = [_restore_state(snapshot, self._settings.audience_vote_shards) for snapshot in snapshots]
+        with traced_lock(self._lock, "session_manager.lock"):
+            self._sessions = {state.id: state for state in states}
 
     def set_active_turn(self, session_id: str, team_index: int) -> SessionState:
-        with self._lock:
+        with traced_lock(self._lock, "session_manager.lock"):
             state = self._require_session(session_id)
             if team_index < 0 or team_index >= len(state.teams):
                 raise ValueError(f"Invalid team index: {team_index}")
@@ -140,3 +202,42 @@ class SessionManager:
             if team.id == team_id:
                 return team
         raise KeyError("Team not found in session")
+
+
+def _export_state(state: SessionState) -> dict:
+    return {
+        "id": state.id,
+        "quiz_id": state.quiz_id,
+        "teams": [asdict(team) for team in state.teams],
+        "used_question_ids": sorted(state.used_question_ids),
+        "current_question_id": state.current_question_id,
+        "question_started_at": state.question_started_at.isoformat() if state.question_started_at else None,
+        "current_turn_index": state.current_turn_index,
+        "timer_seconds": state.timer_seconds,
+        "audience_mode": state.audience_mode,
+        "votes": (
+            {"question_id": state.votes.question_id, "option_count": state.votes.option_count}
+            if state.votes is not None
+            else None
+        ),
+        "last_tally": asdict(state.last_tally) if state.last_tally is not None else None,
+    }
+
+
+def _restore_state(snapshot: dict, vote_shards: int) -> SessionState:
+    started_at = snapshot.get("question_started_at")
+    votes = snapshot.get("votes")
+    last_tally = snapshot.get("last_tally")
+    return SessionState(
+        id=snapshot["id"],
+        quiz_id=snapshot["quiz_id"],
+        teams=[TeamState(**team) for team in snapshot["teams"]],
+        used_question_ids=set(snapshot.get("used_question_ids", [])),
+        current_question_id=snapshot.get("current_question_id"),
+        question_started_at=datetime.fromisoformat(started_at) if started_at else None,
+        current_turn_index=snapshot.get("current_turn_index", 0),
+        timer_seconds=snapshot.get("timer_seconds", 20),
+        audience_mode=snapshot.get("audience_mode", False),
+        votes=VoteCounter(votes["question_id"], votes["option_count"], vote_shards) if votes else None,
+        last_tally=VoteTally(**last_tally) if last_tally else None,
+    )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import random
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import Settings
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Adding or removing a node only remaps the keys that fall on its arcs, so
+    growing from N to N+1 workers moves roughly 1/(N+1) of the slots.
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 64) -> None:
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class ShardMap:
+    """Maps session slots to worker processes.
+
+    Session IDs are prefixed with a slot number (``"002a-<uuid>"``); the ring
+    assigns slots to workers, and each worker only mints IDs in slots it owns,
+    so the owner of any session can be read straight off its ID.
+    """
+
+    def __init__(self, worker_count: int, worker_index: int, slot_count: int, socket_dir: Path) -> None:
+        if not 0 <= worker_index < worker_count:
+            raise ValueError("shard_index must be between 0 and shard_count - 1")
+        self.worker_count = worker_count
+        self.worker_index = worker_index
+        self.slot_count = slot_count
+        self.socket_dir = socket_dir
+        ring = HashRing([self.worker_name(index) for index in range(worker_count)])
+        self._slot_owners: List[int] = [
+            int(ring.node_for(f"slot-{slot}").rsplit("-", 1)[1]) for slot in range(slot_count)
+        ]
+        self._local_slots = [slot for slot, owner in enumerate(self._slot_owners) if owner == worker_index]
+        if not self._local_slots:
+            raise ValueError("This worker owns no slots; increase shard_slot_count")
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["ShardMap"]:
+        if settings.shard_count <= 1:
+            return None
+        return cls(settings.shard_count, settings.shard_index, settings.shard_slot_count, settings.shard_socket_dir)
+
+    @staticmethod
+    def worker_name(index: int) -> str:
+        return f"worker-{index}"
+
+    def socket_path(self, index: int) -> Path:
+        return self.socket_dir / f"{self.worker_name(index)}.sock"
+
+    def mint_session_id(self) -> str:
+        slot = random.choice(self._local_slots)
+        return f"{slot:04x}-{uuid.uuid4()}"
+
+    def owner_of(self, session_id: str) -> Optional[int]:
+        """Return the worker index owning ``session_id``, or None for unsharded IDs."""
+        prefix, sep, _ = session_id.partition("-")
+        if not sep or len(prefix) != 4:
+            return None
+        try:
+            slot = int(prefix, 16)
+        except ValueError:
+            return None
+        if slot >= self.slot_count:
+            return None
+        return self._slot_owners[slot]
+
+    def slot_distribution(self) -> Dict[int, int]:
+        counts = {index: 0 for index in range(self.worker_count)}
+        for owner in self._slot_owners:
+            counts[owner] += 1
+        return counts
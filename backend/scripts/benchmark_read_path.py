@@ -0,0 +1,130 @@
+"""Compare the ORM read path with the Core row + TypeAdapter path used by get_quiz.
+
+Run from the backend directory::
+
+    python -m scripts.benchmark_read_path --questions 10000 --repeat 5
+
+The ORM path mirrors what FastAPI does for a ``response_model`` endpoint
+returning ORM objects: load with ``selectinload``, validate into ``QuizRead``
+with ``from_attributes``, dump to JSON-compatible data and ``json.dumps`` it.
+Both paths run against a throwaway SQLite database and must produce the same
+document.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.api.endpoints.questions import fetch_question_rows
+from app.db.session import Base
+from app.models import Profile, Question, Quiz
+from app.schemas.quiz import QuizRead
+from app.schemas.read_rows import QUIZ_ADAPTER
+
+
+def seed(session: Session, question_count: int) -> str:
+    profile = Profile(name="benchmark")
+    quiz = Quiz(profile=profile, title="Benchmark quiz", description="seeded")
+    session.add_all([profile, quiz])
+    session.flush()
+    difficulties = ["Easy", "Medium", "Hard", "Impossible", None]
+    session.execute(
+        insert(Question),
+        [
+            {
+                "id": str(uuid.uuid4()),
+                "quiz_id": quiz.id,
+                "prompt": f"Question {index}: what is {index} + {index}?",
+                "options": [str(index * 2), str(index), str(index + 1), str(index * 3)],
+                "correct_index": 0,
+                "points": 10 * (index % 4 + 1),
+                "difficulty": difficulties[index % len(difficulties)],
+            }
+            for index in range(question_count)
+        ],
+    )
+    session.commit()
+    return quiz.id
+
+
+def orm_path(session: Session, quiz_id: str) -> bytes:
+    stmt = select(Quiz).where(Quiz.id == quiz_id).options(selectinload(Quiz.questions))
+    quiz = session.scalars(stmt).one()
+    content = QuizRead.model_validate(quiz).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def core_path(session: Session, quiz_id: str) -> bytes:
+    columns = Quiz.__table__.c
+    stmt = select(
+        columns.title,
+        columns.description,
+        columns.id,
+        columns.profile_id,
+        columns.created_at,
+        columns.updated_at,
+    ).where(columns.id == quiz_id)
+    quiz_row = session.execute(stmt).mappings().one()
+    return QUIZ_ADAPTER.dump_json({**quiz_row, "questions": fetch_question_rows(session, quiz_id)})
+
+
+def measure(
+    engine, quiz_id: str, path: Callable[[Session, str], bytes], repeat: int
+) -> Tuple[List[float], int, bytes]:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        # A fresh session per run, as per request, so the identity map starts empty
+        with Session(engine) as session:
+            start = time.perf_counter()
+            body = path(session, quiz_id)
+            timings.append(time.perf_counter() - start)
+
+    with Session(engine) as session:
+        tracemalloc.start()
+        path(session, quiz_id)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return timings, peak, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}", future=True)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            quiz_id = seed(session, args.questions)
+
+        results = {}
+        for name, path in (("orm", orm_path), ("core", core_path)):
+            results[name] = measure(engine, quiz_id, path, args.repeat)
+        engine.dispose()
+
+    if json.loads(results["orm"][2]) != json.loads(results["core"][2]):
+        raise SystemExit("ORM and Core paths produced different documents")
+
+    print(f"{args.questions} questions, median of {args.repeat} runs")
+    print(f"{'path':<6} {'median ms':>10} {'rows/s':>12} {'peak MiB':>9}")
+    for name, (timings, peak, _) in results.items():
+        median = statistics.median(timings)
+        print(f"{name:<6} {median * 1000:>10.1f} {args.questions / median:>12,.0f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
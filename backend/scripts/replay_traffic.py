@@ -0,0 +1,310 @@
+"""Replay a traffic capture against this build and report latency per route.
+
+Record with ``PEACE_TRAFFIC_CAPTURE_DIR`` set, then run from the backend
+directory::
+
+    python -m scripts.replay_traffic CAPTURE.jsonl.gz --speed 4 --report before.json
+    # ...switch to the other build...
+    python -m scripts.replay_traffic CAPTURE.jsonl.gz --speed 4 --baseline before.json
+
+Each run starts from a copy of the SQLite snapshot taken when the capture
+began, with the session manager seeded from the same snapshot, so two builds
+replay identical state. Requests are sent at their recorded offsets divided by
+``--speed`` (``0`` sends them back to back); a request that uses an id minted
+by an earlier request waits for it, and the id is rewritten to the one this run
+minted. ``--serve`` drives a local uvicorn over HTTP instead of the app in
+process. The recorded client pseudonyms are sent as ``X-Forwarded-For`` so
+per-client rate limits see the same clients as in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.traffic_capture import UUID_PATTERN, read_capture
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# (method, url, headers, body) -> (status, response body, elapsed ms)
+Sender = Callable[[str, str, Dict[str, str], Optional[bytes]], Tuple[int, bytes, float]]
+
+
+def plan(requests: List[Dict[str, Any]]) -> Tuple[Dict[str, int], List[Set[int]]]:
+    """Find the ids each write minted and, per request, the earlier requests it depends on."""
+    minted: Dict[str, int] = {}
+    seen: Set[str] = set()
+    depends_on: List[Set[int]] = []
+    for index, record in enumerate(requests):
+        used = set(UUID_PATTERN.findall(_request_text(record)))
+        depends_on.append({minted[found] for found in used if found in minted})
+        seen |= used
+        for found in record.get("ids", []):
+            if found not in seen:
+                minted[found] = index
+                seen.add(found)
+    return minted, depends_on
+
+
+def replay(
+    requests: List[Dict[str, Any]],
+    send: Sender,
+    speed: float,
+    concurrency: int,
+) -> List[Dict[str, Any]]:
+    minted, depends_on = plan(requests)
+    id_map: Dict[str, str] = {}
+    map_lock = threading.Lock()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    futures: List[Optional[Future]] = [None] * len(requests)
+
+    def run(index: int) -> None:
+        record = requests[index]
+        for dependency in depends_on[index]:
+            if futures[dependency] is not None:
+                futures[dependency].result()
+        with map_lock:
+            mapping = dict(id_map)
+        url = _rewrite(record["p"], mapping) + (f"?{_rewrite(record['q'], mapping)}" if record["q"] else "")
+        headers = {name: _rewrite(value, mapping) for name, value in record["h"].items()}
+        headers["x-forwarded-for"] = record["c"]
+        body = _rewrite(record["b"], mapping).encode("utf-8") if record["b"] is not None else None
+        try:
+            status, response, elapsed = send(record["m"], url, headers, body)
+        except Exception as exc:  # noqa: BLE001 - keep replaying, report the failure
+            results[index] = {"record": record, "status": None, "ms": None, "error": repr(exc)}
+            return
+        own = [found for found in record.get("ids", []) if minted.get(found) == index]
+        if own:
+            replayed = list(dict.fromkeys(UUID_PATTERN.findall(response.decode("utf-8", "replace"))))
+            if len(replayed) == len(record["ids"]):
+                with map_lock:
+                    for recorded, new in zip(record["ids"], replayed):
+                        if minted.get(recorded) == index:
+                            id_map[recorded] = new
+        results[index] = {"record": record, "status": status, "ms": elapsed, "error": None}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, record in enumerate(requests):
+            if record.get("sse") or (record["b"] is None and record["bs"] > 0):
+                continue
+            if speed > 0:
+                delay = started + record["t"] / 1000 / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures[index] = pool.submit(run, index)
+    return [result for result in results if result is not None]
+
+
+def summarise(results: List[Dict[str, Any]], skipped: int) -> Dict[str, Any]:
+    routes: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        record = result["record"]
+        routes.setdefault(f"{record['m']} {UUID_PATTERN.sub('{id}', record['p'])}", []).append(result)
+
+    summary: Dict[str, Any] = {}
+    for route, items in sorted(routes.items()):
+        timings = sorted(item["ms"] for item in items if item["ms"] is not None)
+        recorded = sorted(item["record"]["d"] for item in items)
+        summary[route] = {
+            "count": len(items),
+            "errors": sum(1 for item in items if item["error"]),
+            "status_mismatches": sum(1 for item in items if item["status"] != item["record"]["s"]),
+            "p50": _percentile(timings, 0.50),
+            "p95": _percentile(timings, 0.95),
+            "p99": _percentile(timings, 0.99),
+            "mean": round(statistics.fmean(timings), 3) if timings else None,
+            "recorded_p50": _percentile(recorded, 0.50),
+            "recorded_p95": _percentile(recorded, 0.95),
+        }
+    return {
+        "requests": len(results),
+        "skipped": skipped,
+        "status_mismatches": sum(route["status_mismatches"] for route in summary.values()),
+        "routes": summary,
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(
+        f"{report['requests']} requests replayed, {report['skipped']} skipped, "
+        f"{report['status_mismatches']} with a different status than recorded"
+    )
+    if baseline is None:
+        print(f"{'route':<60} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rec p50':>9}")
+        for route, stats in report["routes"].items():
+            print(
+                f"{route:<60} {stats['count']:>6} {_fmt(stats['p50'])} {_fmt(stats['p95'])} "
+                f"{_fmt(stats['p99'])} {_fmt(stats['recorded_p50'])}"
+            )
+        return
+
+    print(f"{'route':<60} {'base p50':>9} {'p50':>9} {'Δ%':>7} {'base p95':>9} {'p95':>9} {'Δ%':>7}")
+    for route, stats in report["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            print(f"{route:<60} {'-':>9} {_fmt(stats['p50'])} {'new':>7}")
+            continue
+        print(
+            f"{route:<60} {_fmt(before['p50'])} {_fmt(stats['p50'])} {_delta(before['p50'], stats['p50'])} "
+            f"{_fmt(before['p95'])} {_fmt(stats['p95'])} {_delta(before['p95'], stats['p95'])}"
+        )
+
+
+@contextmanager
+def in_process(capture: Path, workdir: Path) -> Iterator[Sender]:
+    _prepare_environment(capture, workdir)
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    from starlette.datastructures import Headers
+
+    from app.main import app
+
+    async def forwarded_client(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        # What uvicorn --proxy-headers does for the --serve mode
+        if scope["type"] == "http":
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                scope = {**scope, "client": (forwarded, 0)}
+        await app(scope, receive, send)
+
+    with TestClient(forwarded_client, follow_redirects=False) as client:
+
+        def send(method: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> Tuple[int, bytes, float]:
+            start = time.perf_counter()
+            response = client.request(method, url, headers=headers, content=body)
+            return response.status_code, response.content, (time.perf_counter() - start) * 1000
+
+        yield send
+
+
+@contextmanager
+def served(capture: Path, workdir: Path, concurrency: int) -> Iterator[Sender]:
+    import httpx
+
+    env = _prepare_environment(capture, workdir)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--proxy-headers", "--forwarded-allow-ips", "127.0.0.1",
+            "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30, limits=limits) as client:
+            _wait_until_up(client, server)
+
+            def send(method: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> Tuple[int, bytes, float]:
+                start = time.perf_counter()
+                response = client.request(method, url, headers=headers, content=body)
+                return response.status_code, response.content, (time.perf_counter() - start) * 1000
+
+            yield send
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("capture", type=Path)
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression; 0 sends back to back")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight at most")
+    parser.add_argument("--serve", action="store_true", help="replay over HTTP against a local uvicorn")
+    parser.add_argument("--report", type=Path, help="write the latency report as JSON")
+    parser.add_argument("--baseline", type=Path, help="a report from another build to compare against")
+    args = parser.parse_args()
+
+    capture = args.capture.resolve()
+    header, requests = read_capture(capture)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    workdir = Path(tempfile.mkdtemp(prefix="peace_cake_replay_"))
+    if header["database"]:
+        shutil.copyfile(capture.parent / header["database"], workdir / "peace_cake.db")
+    else:
+        print("capture has no database snapshot; replaying against the configured database", file=sys.stderr)
+
+    try:
+        runner = served(capture, workdir, args.concurrency) if args.serve else in_process(capture, workdir)
+        with runner as send:
+            results = replay(requests, send, args.speed, args.concurrency)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = summarise(results, skipped=len(requests) - len(results))
+    report.update(capture=capture.name, speed=args.speed, target="uvicorn" if args.serve else "in-process")
+    print_report(report, baseline)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+
+
+def _prepare_environment(capture: Path, workdir: Path) -> Dict[str, str]:
+    # Seed the sessions from the capture and make sure the replay is not itself recorded
+    os.environ.pop("PEACE_TRAFFIC_CAPTURE_DIR", None)
+    os.environ["PEACE_TRAFFIC_REPLAY_CAPTURE"] = str(capture)
+    os.environ["PEACE_MEDIA_ROOT"] = str(workdir / "media")
+    return dict(os.environ)
+
+
+def _wait_until_up(client: Any, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {server.returncode}")
+        try:
+            client.get("/api/v1/system/health")
+            return
+        except Exception:  # noqa: BLE001 - not listening yet
+            time.sleep(0.1)
+    raise SystemExit("uvicorn did not start within 30 seconds")
+
+
+def _request_text(record: Dict[str, Any]) -> str:
+    return " ".join(filter(None, [record["p"], record["q"], record["b"], *record["h"].values()]))
+
+
+def _rewrite(text: str, mapping: Dict[str, str]) -> str:
+    if not mapping:
+        return text
+    return UUID_PATTERN.sub(lambda match: mapping.get(match.group(0), match.group(0)), text)
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+
+def _delta(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return f"{'-':>7}"
+    return f"{(after - before) / before * 100:>+6.1f}%"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Run the API in strict query-budget mode against a throwaway database.
+
+Settings and the engine are fixed when ``app.main`` is first imported, so the
+environment is prepared here, before any test module imports the app. A route
+that runs more statements than its ``query_budget``, or repeats one statement
+more than twice, raises ``QueryBudgetExceeded`` out of the TestClient call.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set
+
+import pytest
+
+_WORKDIR = Path(tempfile.mkdtemp(prefix="peace_cake_tests_"))
+ADMIN_TOKEN = "test-admin-token"
+
+os.environ.pop("DATABASE_URL", None)
+os.environ.update(
+    {
+        "PEACE_QUERY_BUDGET_MODE": "strict",
+        "PEACE_ADMIN_TOKEN": ADMIN_TOKEN,
+        "PEACE_QUIZ_PACK_DIR": str(_WORKDIR / "packs"),
+        "PEACE_MEDIA_ROOT": str(_WORKDIR / "media"),
+        "PEACE_PROFILING_DIR": str(_WORKDIR / "profiles"),
+        "PEACE_JOB_WORKERS": "1",
+        "PEACE_RATE_LIMIT_CLIENT_BURST": "1000000",
+        "PEACE_RATE_LIMIT_SESSION_POLL_BURST": "1000000",
+    }
+)
+# The SQLite fallback lives at ./peace_cake.db
+os.chdir(_WORKDIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.types import ASGIApp, Receive, Scope, Send  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+class RouteRecorder:
+    """Remember which endpoints handled a request, to check every budget was exercised."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.endpoints: Set[Any] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router writes the matched endpoint into the shared scope
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                self.endpoints.add(endpoint)
+
+
+@pytest.fixture(scope="session")
+def recorder() -> RouteRecorder:
+    return RouteRecorder(app)
+
+
+@pytest.fixture(scope="session")
+def client(recorder: RouteRecorder) -> Iterator[TestClient]:
+    with TestClient(recorder) as test_client:
+        yield test_client
+    os.chdir(tempfile.gettempdir())
+    shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def admin_headers() -> Dict[str, str]:
+    return {"X-Admin-Token": ADMIN_TOKEN}
+
+
+@pytest.fixture(scope="session")
+def bank(client: TestClient) -> Dict[str, Any]:
+    """A profile with several quizzes of several questions, enough to expose N+1 loads."""
+    profile = client.post("/api/v1/profiles/", json={"name": "Budget bank"}).json()
+    quizzes: List[Dict[str, Any]] = []
+    for quiz_number in range(4):
+        quiz = client.post(
+            f"/api/v1/profiles/{profile['id']}/quizzes",
+            json={"title": f"Quiz {quiz_number}", "description": "budget"},
+        ).json()
+        quiz["questions"] = [
+            client.post(
+                f"/api/v1/quizzes/{quiz['id']}/questions",
+                json={
+                    "prompt": f"Question {quiz_number}.{number}",
+                    "options": ["a", "b", "c", "d"],
+                    "correct_index": number % 4,
+                    "points": 100 * (number % 3 + 1),
+                    "difficulty": ["Easy", "Medium", "Hard"][number % 3],
+                },
+            ).json()
+            for number in range(6)
+        ]
+        quizzes.append(quiz)
+    return {"profile": profile, "quizzes": quizzes}
@@ -0,0 +1,115 @@
+"""Rate limiting in the admission middleware, driven with raw ASGI scopes."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.admission import AdmissionMiddleware
+
+
+async def _ok(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _call(
+    middleware: AdmissionMiddleware,
+    path: str = "/api/v1/profiles/",
+    method: str = "GET",
+    client: Optional[Tuple[str, int]] = None,
+    forwarded_for: Optional[str] = None,
+) -> int:
+    headers: List[Tuple[bytes, bytes]] = []
+    if forwarded_for is not None:
+        headers.append((b"x-forwarded-for", forwarded_for.encode("latin-1")))
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": headers,
+        "query_string": b"",
+        "client": client,
+    }
+    messages: List[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]["status"]
+
+
+def _limited(**overrides: Any) -> AdmissionMiddleware:
+    return AdmissionMiddleware(_ok, **{"client_rate": 0.001, "client_burst": 2, **overrides})
+
+
+def test_distinct_clients_get_their_own_buckets() -> None:
+    middleware = _limited()
+    assert [_call(middleware, client=("203.0.113.1", 1000)) for _ in range(3)] == [200, 200, 429]
+    assert _call(middleware, client=("203.0.113.2", 1000)) == 200
+
+
+def test_unix_socket_peers_are_keyed_on_forwarded_for() -> None:
+    # uvicorn --uds leaves client unset; the proxy in front names the real client
+    middleware = _limited()
+    statuses = [_call(middleware, client=None, forwarded_for="198.51.100.7") for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert _call(middleware, client=None, forwarded_for="198.51.100.8") == 200
+    # A forwarded request keeps the address the first worker saw, behind the spoofable part
+    assert _call(middleware, client=None, forwarded_for="10.0.0.1, 198.51.100.9") == 200
+    assert _call(middleware, client=None, forwarded_for="10.0.0.1, 198.51.100.7") == 429
+
+
+def test_unknown_clients_never_share_a_bucket() -> None:
+    middleware = _limited()
+    assert [_call(middleware, client=None) for _ in range(5)] == [200] * 5
+    assert _call(middleware, client=None, forwarded_for="198.51.100.7") == 200
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers() -> None:
+    middleware = _limited()
+    for address in ("192.0.2.1", "192.0.2.2", "192.0.2.3"):
+        status = _call(middleware, client=("203.0.113.1", 1000), forwarded_for=address)
+    assert status == 429
+    assert _call(middleware, client=("127.0.0.1", 1000), forwarded_for="192.0.2.4") == 200
+
+
+def _audience(**overrides: Any) -> AdmissionMiddleware:
+    settings = {
+        "client_rate": 0.001,
+        "client_burst": 1,
+        "session_poll_rate": 0.001,
+        "session_poll_burst": 1,
+        "audience_rate": 0.001,
+        "audience_burst": 6,
+        "audience_client_rate": 0.001,
+        "audience_client_burst": 3,
+        "is_audience_session": lambda session_id: session_id == "live",
+        **overrides,
+    }
+    return AdmissionMiddleware(_ok, **settings)
+
+
+def test_audience_clients_get_a_larger_but_bounded_allowance() -> None:
+    middleware = _audience()
+    classroom = ("203.0.113.1", 1000)
+    statuses = [_call(middleware, "/api/v1/sessions/live/votes", "POST", classroom) for _ in range(3)]
+    assert statuses == [200, 200, 200]
+    # One address cannot drain the session's shared bucket on its own
+    assert _call(middleware, "/api/v1/sessions/live/votes", "GET", classroom) == 429
+    other = [_call(middleware, "/api/v1/sessions/live/votes", "GET", ("203.0.113.2", 1000)) for _ in range(3)]
+    assert other == [200, 200, 200]
+    assert _call(middleware, "/api/v1/sessions/live/votes", "POST", ("203.0.113.3", 1000)) == 429
+
+
+def test_unknown_sessions_do_not_get_audience_buckets() -> None:
+    middleware = _audience()
+    client = ("203.0.113.1", 1000)
+    statuses = [_call(middleware, f"/api/v1/sessions/fake-{number}/votes", "POST", client) for number in range(2)]
+    assert statuses == [200, 429]
@@ -0,0 +1,40 @@
+"""The per-profile change counter that orders the change feed."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models import ChangeLogCounter
+
+
+def _logged_changes(profile_id: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(ChangeLogCounter.changes).where(ChangeLogCounter.profile_id == profile_id)) or 0
+
+
+def test_every_logged_change_bumps_the_profile_counter(client: TestClient) -> None:
+    profile = client.post("/api/v1/profiles/", json={"name": "Counted"}).json()
+    quiz = client.post(f"/api/v1/profiles/{profile['id']}/quizzes", json={"title": "Counted"}).json()
+    questions = [
+        client.post(
+            f"/api/v1/quizzes/{quiz['id']}/questions",
+            json={"prompt": f"Counted {number}", "options": ["a", "b"], "correct_index": 0, "points": 100},
+        ).json()
+        for number in range(3)
+    ]
+    layout = [{"id": question["id"], "points": 200} for question in questions]
+    client.put(f"/api/v1/quizzes/{quiz['id']}/questions/order", json={"questions": layout})
+    assert _logged_changes(profile["id"]) == 1 + 3 + 3
+
+    feed: Dict[str, Any] = {"next_since": 0, "has_more": True}
+    seen = []
+    while feed["has_more"]:
+        feed = client.get(
+            f"/api/v1/profiles/{profile['id']}/changes", params={"since": feed["next_since"], "limit": 2}
+        ).json()
+        seen.append(feed["next_since"])
+    assert seen == sorted(seen)
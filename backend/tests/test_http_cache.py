@@ -0,0 +1,42 @@
+"""ETags must change with every edit, even two made within the same second."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+
+
+def _revalidate(client: TestClient, url: str, etag: str) -> int:
+    return client.get(url, headers={"If-None-Match": etag}).status_code
+
+
+def test_edits_within_a_second_change_the_etag(client: TestClient) -> None:
+    profile = client.post("/api/v1/profiles/", json={"name": "Quick edits"}).json()
+    quiz = client.post(f"/api/v1/profiles/{profile['id']}/quizzes", json={"title": "First"}).json()
+    question = client.post(
+        f"/api/v1/quizzes/{quiz['id']}/questions",
+        json={"prompt": "First", "options": ["a", "b"], "correct_index": 0, "points": 100},
+    ).json()
+    urls = [
+        f"/api/v1/quizzes/{quiz['id']}",
+        f"/api/v1/quizzes/{quiz['id']}/questions",
+        f"/api/v1/profiles/{profile['id']}",
+    ]
+    etags: Dict[str, Any] = {url: client.get(url).headers["ETag"] for url in urls}
+
+    client.put(f"/api/v1/quizzes/{quiz['id']}", json={"title": "Second"})
+    client.put(f"/api/v1/questions/{question['id']}", json={"prompt": "Second"})
+
+    assert [_revalidate(client, url, etags[url]) for url in urls] == [200, 200, 200]
+
+
+def test_compressed_responses_carry_a_weak_etag(client: TestClient, bank: Dict[str, Any]) -> None:
+    url = f"/api/v1/quizzes/{bank['quizzes'][0]['id']}"
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == f"W/{identity.headers['ETag']}"
+    assert not identity.headers["ETag"].startswith("W/")
+    assert compressed.json() == identity.json()
+    assert _revalidate(client, url, compressed.headers["ETag"]) == 304
@@ -0,0 +1,230 @@
+"""Every budgeted route, driven under strict mode (see conftest.py).
+
+Reads run against a bank of several quizzes with several questions each, so a
+per-quiz or per-question query shows up as a blown budget or a repeated
+statement rather than passing on a single row.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, List
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.db.query_counter import get_query_budget
+from app.main import app
+
+
+def _make_quiz(client: TestClient, profile_id: str, questions: int = 3) -> Dict[str, Any]:
+    quiz = client.post(f"/api/v1/profiles/{profile_id}/quizzes", json={"title": "Scratch"}).json()
+    quiz["questions"] = [
+        client.post(
+            f"/api/v1/quizzes/{quiz['id']}/questions",
+            json={"prompt": f"Scratch {number}", "options": ["a", "b"], "correct_index": 0, "points": 100 * (number + 1)},
+        ).json()
+        for number in range(questions)
+    ]
+    return quiz
+
+
+def test_system_routes(client: TestClient, admin_headers: Dict[str, str]) -> None:
+    assert client.get("/api/v1/system/health").status_code == 200
+    assert client.get("/api/v1/system/config").status_code == 200
+
+    profiled = client.get("/api/v1/system/health", headers={**admin_headers, "X-Profile": "1"})
+    profile_id = profiled.headers["X-Profile-Id"]
+    assert client.get(f"/api/v1/system/profiles/{profile_id}", headers=admin_headers).status_code == 200
+
+    assert client.post("/api/v1/system/tracemalloc/start", headers=admin_headers).status_code == 204
+    assert client.get("/api/v1/system/tracemalloc/snapshot", headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/system/tracemalloc/diff", headers=admin_headers).status_code == 200
+    assert client.post("/api/v1/system/tracemalloc/stop", headers=admin_headers).status_code == 204
+
+    assert client.post("/api/v1/system/maintenance", headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/system/maintenance", headers=admin_headers).status_code == 200
+
+
+def test_profile_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    profile_id = bank["profile"]["id"]
+    created = client.post("/api/v1/profiles/", json={"name": "Another"})
+    assert created.status_code == 201
+
+    assert len(client.get("/api/v1/profiles/").json()) >= 2
+    profile = client.get(f"/api/v1/profiles/{profile_id}")
+    assert profile.status_code == 200
+    assert len(profile.json()["quizzes"]) == len(bank["quizzes"])
+    assert client.patch(f"/api/v1/profiles/{created.json()['id']}", json={"name": "Renamed"}).status_code == 200
+
+
+def test_delete_profile(client: TestClient) -> None:
+    for prefer in (None, "respond-async"):
+        profile = client.post("/api/v1/profiles/", json={"name": "Doomed"}).json()
+        for _ in range(3):
+            _make_quiz(client, profile["id"])
+        headers = {"Prefer": prefer} if prefer else {}
+        response = client.delete(f"/api/v1/profiles/{profile['id']}", headers=headers)
+        assert response.status_code == (202 if prefer else 204)
+
+
+def test_change_feed(client: TestClient, bank: Dict[str, Any]) -> None:
+    profile_id = bank["profile"]["id"]
+    feed = client.get(f"/api/v1/profiles/{profile_id}/changes")
+    assert feed.status_code == 200
+    page = client.get(f"/api/v1/profiles/{profile_id}/changes", params={"since": 0, "limit": 5})
+    assert page.json()["has_more"]
+
+
+def test_quiz_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    profile_id = bank["profile"]["id"]
+    summaries = client.get(f"/api/v1/profiles/{profile_id}/quizzes")
+    assert summaries.status_code == 200
+    assert [summary["question_count"] for summary in summaries.json()] == [6] * len(bank["quizzes"])
+
+    for quiz in bank["quizzes"]:
+        read = client.get(f"/api/v1/quizzes/{quiz['id']}")
+        assert read.status_code == 200
+        assert len(read.json()["questions"]) == 6
+        cached = client.get(f"/api/v1/quizzes/{quiz['id']}", headers={"If-None-Match": read.headers["ETag"]})
+        assert cached.status_code == 304
+        assert client.get(f"/api/v1/quizzes/{quiz['id']}/pack").status_code == 200
+
+    quiz = _make_quiz(client, profile_id)
+    assert client.put(f"/api/v1/quizzes/{quiz['id']}", json={"title": "Renamed"}).status_code == 200
+    copy = client.post(f"/api/v1/quizzes/{bank['quizzes'][0]['id']}/duplicate")
+    assert copy.status_code == 200
+    assert len(copy.json()["questions"]) == 6
+    queued = client.post(f"/api/v1/quizzes/{quiz['id']}/duplicate", headers={"Prefer": "respond-async"})
+    assert queued.status_code == 202
+    assert client.delete(f"/api/v1/quizzes/{copy.json()['id']}").status_code == 200
+
+
+def test_assemble_quiz(client: TestClient, bank: Dict[str, Any]) -> None:
+    profile_id = bank["profile"]["id"]
+    assembly = {
+        "title": "Assembled",
+        "strata": [
+            {"points": 100, "count": 2},
+            {"points": 200, "difficulty": "Medium", "count": 2},
+            {"points": 300, "difficulty": "Hard", "count": 1},
+        ],
+    }
+    first = client.post(f"/api/v1/profiles/{profile_id}/quizzes/assemble", json=assembly)
+    assert first.status_code == 201
+    assert len(first.json()["questions"]) == 5
+
+    # The second assembly refreshes the sample index incrementally
+    _make_quiz(client, profile_id)
+    second = client.post(
+        f"/api/v1/profiles/{profile_id}/quizzes/assemble", json={**assembly, "exclude_recent_days": 0}
+    )
+    assert second.status_code == 201
+
+
+def test_question_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    quiz = _make_quiz(client, bank["profile"]["id"], questions=5)
+    listed = client.get(f"/api/v1/quizzes/{quiz['id']}/questions")
+    assert listed.status_code == 200
+    assert len(listed.json()) == 5
+
+    question_id = quiz["questions"][0]["id"]
+    assert client.get(f"/api/v1/questions/{question_id}").status_code == 200
+    updated = client.put(f"/api/v1/questions/{question_id}", json={"prompt": "Edited", "correct_index": 1})
+    assert updated.status_code == 200
+    reordered = client.patch(f"/api/v1/questions/{question_id}/order", json={"points": 500, "difficulty": "Hard"})
+    assert reordered.status_code == 200
+
+    layout: List[Dict[str, Any]] = [
+        {"id": question["id"], "points": 100 * (5 - number)} for number, question in enumerate(quiz["questions"])
+    ]
+    board = client.put(f"/api/v1/quizzes/{quiz['id']}/questions/order", json={"questions": layout})
+    assert board.status_code == 200
+    assert client.delete(f"/api/v1/questions/{question_id}").status_code == 200
+
+
+def test_batch_route(client: TestClient, bank: Dict[str, Any]) -> None:
+    quiz = _make_quiz(client, bank["profile"]["id"], questions=4)
+    questions = quiz["questions"]
+    operations: List[Dict[str, Any]] = [{"op": "update_quiz", "quiz_id": quiz["id"], "data": {"title": "Batched"}}]
+    operations += [
+        {"op": "update_question", "question_id": question["id"], "data": {"prompt": f"Batched {number}"}}
+        for number, question in enumerate(questions[:3])
+    ]
+    operations += [
+        {
+            "op": "create_question",
+            "quiz_id": quiz["id"],
+            "data": {"prompt": f"New {number}", "options": ["a", "b"], "correct_index": 1, "points": 500},
+        }
+        for number in range(3)
+    ]
+    operations.append({"op": "delete_question", "question_id": questions[3]["id"]})
+    batch = client.post("/api/v1/batch/", json={"operations": operations})
+    assert batch.status_code == 200
+    assert len(batch.json()["results"]) == len(operations)
+
+
+def test_session_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    quiz = bank["quizzes"][1]
+    created = client.post(
+        "/api/v1/sessions/",
+        json={"quiz_id": quiz["id"], "teams": [{"name": "Red"}, {"name": "Blue"}], "audience_mode": True},
+    )
+    assert created.status_code == 201
+    session = created.json()
+    base = f"/api/v1/sessions/{session['id']}"
+    assert client.get(base).status_code == 200
+
+    question_id = quiz["questions"][2]["id"]
+    assert client.post(f"{base}/question/{question_id}/start").status_code == 200
+    for device in range(5):
+        vote = {"question_id": question_id, "device_id": f"device-{device}", "answer_index": device % 4}
+        assert client.post(f"{base}/votes", json=vote).status_code == 202
+    assert client.get(f"{base}/votes").json()["total"] == 5
+    # An unknown session ends the stream before it starts
+    assert client.get("/api/v1/sessions/unknown/votes/stream").status_code == 404
+
+    resolved = client.post(
+        f"{base}/question/{question_id}/resolve", json={"team_id": session["teams"][0]["id"], "outcome": "correct"}
+    )
+    assert resolved.status_code == 200
+    assert client.post(f"{base}/turn/1").status_code == 200
+
+
+def test_attachment_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    question_id = bank["quizzes"][2]["questions"][0]["id"]
+    image = io.BytesIO()
+    Image.new("RGB", (64, 48), "orange").save(image, format="PNG")
+    uploaded = client.post(
+        f"/api/v1/questions/{question_id}/attachments",
+        files={"file": ("board.png", image.getvalue(), "image/png")},
+    )
+    assert uploaded.status_code == 201
+    attachment = uploaded.json()
+
+    assert len(client.get(f"/api/v1/questions/{question_id}/attachments").json()) == 1
+    assert client.get(f"/api/v1/media/{attachment['content_hash']}").status_code == 200
+    assert client.delete(f"/api/v1/attachments/{attachment['id']}").status_code == 204
+
+
+def test_job_routes(client: TestClient, bank: Dict[str, Any]) -> None:
+    queued = client.post(f"/api/v1/quizzes/{bank['quizzes'][3]['id']}/duplicate", headers={"Prefer": "respond-async"})
+    assert queued.status_code == 202
+    job_id = queued.json()["id"]
+
+    assert len(client.get("/api/v1/jobs/", params={"profile_id": bank["profile"]["id"]}).json()) >= 1
+    assert client.get(f"/api/v1/jobs/{job_id}").status_code == 200
+    # The worker may already have picked the job up, or finished it
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel").status_code in (200, 202, 409)
+
+
+def test_every_route_is_budgeted_and_exercised(recorder: Any) -> None:
+    """Runs last in this module: every route needs a budget and a call above."""
+    routes = [route for route in app.routes if isinstance(route, APIRoute)]
+    unbudgeted = sorted(route.path for route in routes if get_query_budget(route.endpoint) is None)
+    assert not unbudgeted, f"routes without a query budget: {unbudgeted}"
+    budgeted = {route.endpoint: route.path for route in routes}
+    missing = sorted(path for endpoint, path in budgeted.items() if endpoint not in recorder.endpoints)
+    assert not missing, f"budgeted routes never exercised: {missing}"
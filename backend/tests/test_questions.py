@@ -0,0 +1,30 @@
+"""Question editing behaviour beyond the query budgets."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+
+
+def test_board_layout_keeps_omitted_difficulties(client: TestClient, bank: Dict[str, Any]) -> None:
+    quiz = client.post(f"/api/v1/profiles/{bank['profile']['id']}/quizzes", json={"title": "Layout"}).json()
+    first, second, third = (
+        client.post(
+            f"/api/v1/quizzes/{quiz['id']}/questions",
+            json={"prompt": f"Layout {number}", "options": ["a", "b"], "correct_index": 0, "points": 100},
+        ).json()["id"]
+        for number in range(3)
+    )
+    for question_id, difficulty in ((first, "Easy"), (second, "Hard"), (third, "Medium")):
+        client.patch(f"/api/v1/questions/{question_id}/order", json={"difficulty": difficulty})
+
+    layout = [
+        {"id": first, "points": 300},
+        {"id": second, "points": 400},
+        {"id": third, "points": 500, "difficulty": "Impossible"},
+    ]
+    board = client.put(f"/api/v1/quizzes/{quiz['id']}/questions/order", json={"questions": layout})
+    assert board.status_code == 200
+    placed = {question["id"]: (question["points"], question["difficulty"]) for question in board.json()}
+    assert placed == {first: (300, "Easy"), second: (400, "Hard"), third: (500, "Impossible")}
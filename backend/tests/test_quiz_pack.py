@@ -0,0 +1,39 @@
+"""Pack versions come from the quiz's profile, so other profiles cannot age a pack."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import SessionLocal, engine
+from app.services.quiz_pack import QuizPackStore
+
+
+def _new_quiz(client: TestClient, name: str) -> str:
+    profile = client.post("/api/v1/profiles/", json={"name": name}).json()
+    return client.post(f"/api/v1/profiles/{profile['id']}/quizzes", json={"title": name}).json()["id"]
+
+
+def test_pack_versions_ignore_other_profiles(client: TestClient, tmp_path: Path) -> None:
+    # Its own session factory, so the app's commits do not touch this store
+    store = QuizPackStore(sessionmaker(bind=engine), tmp_path)
+    quiz_id = _new_quiz(client, "Packed")
+    with SessionLocal() as db:
+        stale = store._build(db, quiz_id)
+    assert stale.built_version == 1
+
+    other_id = _new_quiz(client, "Busy")
+    for number in range(3):
+        client.put(f"/api/v1/quizzes/{other_id}", json={"title": f"Busy {number}"})
+    client.put(f"/api/v1/quizzes/{quiz_id}", json={"title": "Renamed"})
+    store._path(quiz_id).unlink()
+    with SessionLocal() as db:
+        fresh = store._build(db, quiz_id)
+    assert fresh.built_version == 2
+
+    # A build that read the rows before the rename cannot replace the newer pack
+    store._persist(quiz_id, bytes(stale._buffer))
+    with SessionLocal() as db:
+        assert store.load(db, quiz_id).built_version == 2
@@ -0,0 +1,57 @@
+"""Game-state rules of the in-memory session manager."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.services.session_manager import SessionManager
+
+
+def _voting_session(manager: SessionManager) -> tuple:
+    state = manager.create_session("quiz", ["Red", "Blue"], audience_mode=True)
+    manager.start_question(state.id, "question", option_count=4)
+    assert manager.cast_vote(state.id, "question", "device-1", 2)
+    return state, state.teams[0], state.teams[1]
+
+
+@pytest.mark.parametrize(
+    ("outcome", "steal_attempt"),
+    [
+        ("maybe", None),
+        ("correct", {"team_id": "team", "outcome": "correct"}),
+        ("incorrect", {"team_id": "team", "outcome": "perhaps"}),
+    ],
+)
+def test_rejected_resolve_keeps_the_question_open(outcome: str, steal_attempt: dict) -> None:
+    manager = SessionManager()
+    state, red, blue = _voting_session(manager)
+    if steal_attempt:
+        steal_attempt = {**steal_attempt, "team_id": blue.id}
+
+    with pytest.raises(ValueError):
+        manager.resolve_question(
+            state.id, "question", red.id, outcome, points=100, steal_attempt=steal_attempt, correct_index=2
+        )
+
+    assert state.current_question_id == "question"
+    assert (red.score, blue.score) == (0, 0)
+    assert manager.cast_vote(state.id, "question", "device-2", 2)
+    assert manager.current_tally(state.id).total == 2
+
+
+def test_audience_resolve_closes_the_ballot_after_validation() -> None:
+    manager = SessionManager()
+    state, red, blue = _voting_session(manager)
+
+    manager.resolve_question(
+        state.id,
+        "question",
+        red.id,
+        None,
+        points=100,
+        steal_attempt={"team_id": blue.id, "outcome": "correct"},
+        correct_index=1,
+    )
+
+    assert state.votes is None and state.last_tally.closed
+    assert (red.score, blue.score) == (0, 50)